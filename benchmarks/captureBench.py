@@ -0,0 +1,162 @@
+"""Benchmarks for the functions that run on every capture.
+
+Run from the repository root:
+    python3 benchmarks/captureBench.py --output bench_results.json
+    python3 benchmarks/captureBench.py --log_lines 2000000 --baseline old_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "tools"))
+sys.dont_write_bytecode = True
+
+import RFFunctions as tools
+import Clicker
+
+# Capture sizes in bytes: a keyfob burst, a few repeated presses, and a long OOK capture
+CAPTURE_SIZES = {"keyfob": 16, "press": 256, "long": 4096}
+
+#-----------------Synthetic Captures ----------------#
+def generateCapture(rng, size):
+    """Returns the hex of a capture of about size bytes made of PWM keyfob keys separated by zero gaps,
+    the way RFrecv returns a held button."""
+    key = ''.join(rng.choice('01') for _ in range(24))
+    burst = ''.join(['1000' if b == '1' else '1110' for b in key]) + '0' * rng.randint(16, 48)
+    bits = ''
+    while len(bits) < size * 8:
+        bits += burst
+    bits = bits[:size * 8]
+    return int(bits, 2).to_bytes(size, 'big').hex()
+
+def generateLog(path, lines, rng, size=CAPTURE_SIZES["press"]):
+    """Writes a scanning log of lines lines (half "found" lines, half captures) to path."""
+    captures = [generateCapture(rng, size) for _ in range(64)]
+    frequencies = [315000000, 390000000, 433920000, 868000000]
+    with open(path, 'w') as file:
+        for i in range(lines // 2):
+            file.write("A signal was found on: " + str(rng.choice(frequencies)) + "\n" + captures[i % 64] + "\n")
+
+
+#-----------------Measurement ----------------#
+def percentile(values, fraction):
+    """Returns the value at a fraction of the way through a sorted list."""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def measure(name, label, function, inputs, unit_bytes, min_time=1.0):
+    """Calls function on each input until min_time seconds have passed and returns a result dictionary
+    with throughput, latency percentiles in microseconds and the peak traced memory of one call."""
+    latencies = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < min_time or not latencies:
+        for value in inputs:
+            t = time.perf_counter()
+            function(value)
+            latencies.append(time.perf_counter() - t)
+    total = sum(latencies)
+    latencies.sort()
+
+    tracemalloc.start()
+    function(inputs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "function": name,
+        "input": label,
+        "calls": len(latencies),
+        "calls_per_second": len(latencies) / total,
+        "megabytes_per_second": len(latencies) * unit_bytes / total / 1e6,
+        "latency_us": {
+            "p50": percentile(latencies, 0.50) * 1e6,
+            "p90": percentile(latencies, 0.90) * 1e6,
+            "p99": percentile(latencies, 0.99) * 1e6,
+            "max": latencies[-1] * 1e6,
+        },
+        "peak_memory_bytes": peak,
+    }
+
+def runBenchmarks(log_lines, min_time, seed):
+    """Runs every benchmark and returns the list of result dictionaries."""
+    rng = random.Random(seed)
+    clicker = Clicker.Clicker(generateCapture(rng, CAPTURE_SIZES["keyfob"]))
+    results = []
+
+    for label, size in CAPTURE_SIZES.items():
+        captures = [generateCapture(rng, size) for _ in range(32)]
+        segments = [tools.splitCaptureByZeros(capture) or [capture] for capture in captures]
+        binaries = [bin(int(capture, 16))[2:] for capture in captures]
+        pairs = [(captures[i], captures[(i + 1) % len(captures)]) for i in range(len(captures))]
+
+        results.append(measure("splitCaptureByZeros", label, tools.splitCaptureByZeros, captures, size, min_time))
+        results.append(measure("createBytesFromPayloads", label, tools.createBytesFromPayloads, segments, size, min_time))
+        results.append(measure("turnToBytes", label, tools.turnToBytes, binaries, size, min_time))
+        results.append(measure("payloadsToBinary", label, clicker.payloadsToBinary, captures, size, min_time))
+        results.append(measure("convertAndCompare", label, lambda pair: clicker.convertAndCompare(*pair), pairs, size, min_time))
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "bench.log")
+        generateLog(log_file, log_lines, rng)
+        log_size = os.path.getsize(log_file)
+        results.append(measure("parseSignalsFromLog", f"{log_lines}_lines", tools.parseSignalsFromLog, [log_file], log_size, min_time))
+
+    return results
+
+
+#-----------------Reporting ----------------#
+def gitRevision():
+    """Returns the current commit of the repository, if it can be found."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def printComparison(results, baseline_file):
+    """Prints the speedup of each result over the matching entry of an earlier results file."""
+    with open(baseline_file) as f:
+        baseline = {(r["function"], r["input"]): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get((result["function"], result["input"]))
+        if old:
+            speedup = result["calls_per_second"] / old["calls_per_second"]
+            print(f"{result['function']:<24} {result['input']:<14} {speedup:6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the capture-processing hot paths.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--log_lines", default=200000, type=int, help="Lines in the synthetic scanning log.")
+    parser.add_argument("--min_time", default=1.0, type=float, help="Seconds to spend on each benchmark.")
+    parser.add_argument("--seed", default=0, type=int, help="Seed for the synthetic captures.")
+    parser.add_argument("--baseline", help="An earlier results file to compare against.")
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.log_lines, args.min_time, args.seed)
+    report = {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "revision": gitRevision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "log_lines": args.log_lines,
+        "results": results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    for result in results:
+        print(f"{result['function']:<24} {result['input']:<14} {result['calls_per_second']:>12.1f} calls/s "
+              f"p50 {result['latency_us']['p50']:>10.1f} us  p99 {result['latency_us']['p99']:>10.1f} us  "
+              f"peak {result['peak_memory_bytes'] / 1024:>10.1f} KiB")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        printComparison(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -1,138 +1,402 @@
-from rflib import *
-import src.tools.RFFunctions as tools
-import re, time, argparse, textwrap
-import src.tools.jam as jam
-import src.tools.findDevices as findDevices
-import src.tools.attacks as attacks
-import src.tools.RFSettings as RFSettings
-import src.tools.utilities as utilities
-import src.tools.Clicker as Clicker
-import sys
-
-# Setup argument parser
-parser = argparse.ArgumentParser(
-    description="A tool for RF communication and attacks.",
-    formatter_class=argparse.RawTextHelpFormatter
-)
-
-parser.add_argument("-s", "--send", action='store_true', help="Send a saved payload from a file.")
-parser.add_argument("-i", "--instant_replay", action='store_true', help="Replay a captured signal in real-time.")
-parser.add_argument("-r", "--rolling_code", default=False, action='store_true', help="Perform a rolling code attack.")
-parser.add_argument("-t", "--targeted_attack", help="Perform a targeted attack (not fully implemented).")
-parser.add_argument("-j", "--jammer", action='store_true', help="Activate the jammer to disrupt signals.")
-parser.add_argument("-b", "--brute_scanner", action='store_true', help="Brute force frequency scanning.")
-parser.add_argument("-k", "--known_scanner", action='store_true', help="Scan known frequencies for devices.")
-parser.add_argument("-v", "--increment_value", help="Specify increment value for brute force scanning.", type=int)
-parser.add_argument('-u', "--uploaded_payload", help="Specify the file path of the payload to upload and send.")
-parser.add_argument('-f', "--list", nargs='+', type=int, default=[315000000, 433000000], help="List of frequencies to scan.")
-parser.add_argument('-a', "--jamming_variance", default=80000, help="Specify variance for jamming frequency.", type=int)
-parser.add_argument('-d', "--save_device_settings", action='store_true', help="Save current device settings to a template.")
-parser.add_argument('-l', "--load_device_settings", help="Load device settings from a template file.")
-parser.add_argument('-c', "--compare", action='store_true', help="Compare a captured signal with a known signal.")
-parser.add_argument('-n', "--no_instance", action='store_true', help="Run without initializing a device instance.")
-parser.add_argument('-g', "--graph_signal", action='store_true', help="Graph the signal from a captured payload.")
-parser.add_argument('-D', "--de_bruijn", action='store_true', help="Generate and send a de Bruijn sequence.")
-parser.add_argument('-B', "--baud_rate", default=4800, help="Specify baud rate for communication.", type=int)
-parser.add_argument('-U', "--upper_rssi", default=-100, help="Specify upper RSSI threshold.", type=int)
-parser.add_argument('-L', "--lower_rssi", default=-20, help="Specify lower RSSI threshold.", type=int)
-parser.add_argument("-F", "--frequency", default=315000000, help="Specify the frequency for communication.", type=int)
-parser.add_argument('-C', "--channel_bandwidth", default=60000, help="Specify the channel bandwidth.", type=int)
-parser.add_argument("-M", "--modulation_type", default="MOD_ASK_OOK", help="Specify modulation type (e.g., MOD_ASK_OOK, MOD_2FSK).")
-parser.add_argument("-S", "--channel_spacing", default=24000, help="Specify the channel spacing.", type=int)
-parser.add_argument("-V", "--deviation", default=0, help="Specify the deviation for the RF signal.", type=int)
-
-args = parser.parse_args()
-
-# Initialize RFSettings object
-rf_settings = RFSettings.RFSettings(
-    frequency=args.frequency,
-    baud_rate=args.baud_rate,
-    channel_bandwidth=args.channel_bandwidth,
-    modulation_type=args.modulation_type,
-    upper_rssi=args.upper_rssi,
-    lower_rssi=args.lower_rssi,
-    channel_spacing=args.channel_spacing,
-    deviation=args.deviation
-)
-
-# Load device settings from a file if specified
-if args.load_device_settings:
-    try:
-        with open(args.load_device_settings) as f:
-            file_data = f.readlines()
-            rf_settings.loadDeviceSettingsTemplate(file_data)
-    except Exception as e:
-        print(f"Error loading device settings: {e}")
-        sys.exit(1)
-
-# Initialize the RfCat device if necessary
-if not args.jammer and not args.no_instance:
-    try:
-        d = RfCat(idx=0)
-        d.setFreq(int(rf_settings.frequency))
-        d.setMdmDRate(rf_settings.baud_rate)
-        d.setMaxPower()
-        d.setMdmChanSpc(rf_settings.channel_spacing)
-        d.setMdmChanBW(rf_settings.channel_bandwidth)
-        d.setMdmSyncMode(0)
-        d.setChannel(0)
-        d.lowball(1)
-        if rf_settings.deviation != 0:
-            d.setMdmDeviatn(rf_settings.deviation)
-        if rf_settings.modulation_type == "MOD_ASK_OOK":
-            d.setMdmModulation(MOD_ASK_OOK)
-        elif rf_settings.modulation_type == "MOD_2FSK":
-            d.setMdmModulation(MOD_2FSK)
-    except Exception as e:
-        print(f"Error initializing RF device: {e}")
-        sys.exit(1)
-
-# Execute the specified operations based on command-line arguments
-if args.rolling_code:
-    print("Don't forget to change the default frequency and modulation type")
-    attacks.rollingCode(d, rf_settings, args.rolling_code, args.jamming_variance)
-
-if args.known_scanner and not args.compare:
-    print("For a custom list, use the -f option in the format -f 433000000 314000000 390000000")
-    findDevices.searchKnownFreqs(d, args.list)
-
-if args.brute_scanner:
-    if args.increment_value is None:
-        print("Bruteforcing requires -v argument for an incrementing interval value (e.g., 500000)")
-    else:
-        findDevices.bruteForceFreq(d, rf_settings, args.increment_value)
-
-if args.jammer:
-    j = jam.setupJammer(0, rf_settings)
-    jam.jamming(j, "start", rf_settings, args.rolling_code)
-
-if args.instant_replay:
-    attacks.replayLiveCapture(d, args.rolling_code, rf_settings)
-
-if args.send:
-    if args.uploaded_payload is None:
-        print("Send requires -u argument for an upload file path (e.g., ./captures/payload.cap)")
-    else:
-        attacks.replaySavedCapture(d, args.uploaded_payload)
-
-if args.save_device_settings:
-    device_name = input("What would you like to name the device template: ")
-    rf_settings.saveDeviceSettingsTemplate(device_name)
-
-if args.known_scanner and args.compare:
-    print("Uses lowercase f parameter to specify a single value frequency list")
-    findDevices.searchKnownFreqs(d, args.list, args.compare)
-
-if args.compare and args.uploaded_payload is not None:
-    my_clicker = Clicker.Clicker(args.uploaded_payload)
-    utilities.logTail(my_clicker)
-
-if args.graph_signal and args.uploaded_payload is not None:
-    my_clicker = Clicker.Clicker(args.uploaded_payload)
-    captured_payload_binary = my_clicker.payloadsToBinary(my_clicker.captured_payload)
-    my_clicker.createGraph(captured_payload_binary, 0)
-    my_clicker.outputImagesComparisons(1)
-    my_clicker.openImage('./imageOutput/Graph1.png')
-
-if args.de_bruijn:
-    attacks.deBruijn(d)
+import time
+start_time = time.perf_counter()
+import argparse, os, sys
+
+# The tool modules import each other by name, and are only ever imported here by that name
+# too so each is loaded once
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools"))
+import RFSettings
+
+# Heavy modules are imported by the modes that need them so template and
+# non-radio commands start quickly. --startup_time reports which were loaded.
+HEAVY_MODULES = ["rflib", "matplotlib", "numpy", "bitstring"]
+
+# Setup argument parser
+parser = argparse.ArgumentParser(
+    description="A tool for RF communication and attacks.",
+    formatter_class=argparse.RawTextHelpFormatter
+)
+
+parser.add_argument("-s", "--send", action='store_true', help="Send a saved payload from a file.")
+parser.add_argument("-i", "--instant_replay", action='store_true', help="Replay a captured signal in real-time.")
+parser.add_argument("-r", "--rolling_code", default=False, action='store_true', help="Perform a rolling code attack.")
+parser.add_argument("-t", "--targeted_attack", help="Perform a targeted attack (not fully implemented).")
+parser.add_argument("-j", "--jammer", action='store_true', help="Activate the jammer to disrupt signals.")
+parser.add_argument("-b", "--brute_scanner", action='store_true', help="Brute force frequency scanning.")
+parser.add_argument("-k", "--known_scanner", action='store_true', help="Scan known frequencies for devices.")
+parser.add_argument("-v", "--increment_value", help="Specify increment value for brute force scanning.", type=int)
+parser.add_argument('-u', "--uploaded_payload", help="Specify the file path of the payload to upload and send.")
+parser.add_argument('-f', "--list", nargs='+', type=int, default=[315000000, 433000000], help="List of frequencies to scan.")
+parser.add_argument('-a', "--jamming_variance", default=80000, help="Specify variance for jamming frequency.", type=int)
+parser.add_argument('-d', "--save_device_settings", action='store_true', help="Save current device settings to a template.")
+parser.add_argument('-l', "--load_device_settings", help="Load device settings from a template file.")
+parser.add_argument('-c', "--compare", action='store_true', help="Compare a captured signal with a known signal.")
+parser.add_argument('-n', "--no_instance", action='store_true', help="Run without initializing a device instance.")
+parser.add_argument('-g', "--graph_signal", action='store_true', help="Graph the signal from a captured payload.")
+parser.add_argument('-o', "--compare_log", help="Graph the uploaded payload against every capture in a scanning log (use with -g).")
+parser.add_argument('-P', "--render_workers", type=int, help="Number of processes used to render graphs in batch.")
+parser.add_argument('-D', "--de_bruijn", action='store_true', help="Generate and send a de Bruijn sequence.")
+parser.add_argument('-B', "--baud_rate", default=4800, help="Specify baud rate for communication.", type=int)
+parser.add_argument('-U', "--upper_rssi", default=-100, help="Specify upper RSSI threshold.", type=int)
+parser.add_argument('-L', "--lower_rssi", default=-20, help="Specify lower RSSI threshold.", type=int)
+parser.add_argument("-F", "--frequency", default=315000000, help="Specify the frequency for communication.", type=int)
+parser.add_argument('-C', "--channel_bandwidth", default=60000, help="Specify the channel bandwidth.", type=int)
+parser.add_argument("-M", "--modulation_type", default="MOD_ASK_OOK", help="Specify modulation type (e.g., MOD_ASK_OOK, MOD_2FSK).")
+parser.add_argument("-S", "--channel_spacing", default=24000, help="Specify the channel spacing.", type=int)
+parser.add_argument("-V", "--deviation", default=0, help="Specify the deviation for the RF signal.", type=int)
+parser.add_argument("-O", "--capture_store", help="Capture store file to record scans into or import/export from.")
+parser.add_argument("--import_log", help="Import a text scanning log into the capture store.")
+parser.add_argument("--import_cap", help="Import a .cap payload file into the capture store using -F as its frequency.")
+parser.add_argument("--export_log", help="Export captures from the capture store as a text scanning log.")
+parser.add_argument("--export_cap", help="Export captures from the capture store as a .cap payload file.")
+parser.add_argument("--simulate", help="Replay a capture store, text log or 'synthetic[:freq,...]' session instead of using a YardStick.")
+parser.add_argument("--speed", default=1.0, type=float, help="Speed of a simulated session as a multiple of real time, 0 for as fast as possible.")
+parser.add_argument("--similarity_index", help="Similarity index file that scans add captures to, or that --import_log, --similar and --clusters use.")
+parser.add_argument("--similar", type=int, help="List this many indexed captures most similar to the -u payload.")
+parser.add_argument("--clusters", type=float, help="Group indexed captures into signal families at this similarity (e.g., 0.6).")
+parser.add_argument("--startup_time", action='store_true', help="Report how long startup took and which heavy modules were imported.")
+parser.add_argument("-I", "--device_indexes", nargs='+', type=int, help="Scan with several YardSticks at once by index (e.g., -I 0 1 2), use with -k or -b.")
+parser.add_argument("-E", "--end_frequency", type=int, help="Frequency a brute force scan stops at.")
+parser.add_argument("--rssi_sweep", action='store_true', help="Brute force in two stages: a fast RSSI sweep, then receiving only on frequencies above the noise floor (use with -b).")
+parser.add_argument("--sweep_threshold", default=10, type=int, help="dB above the noise floor a frequency must reach during an RSSI sweep.")
+parser.add_argument("--sweep_passes", default=1, type=int, help="Number of RSSI sweeps, keeping the highest reading of each frequency.")
+parser.add_argument("--decode", action='store_true', help="Decode the -u payload, or every capture in the -o log, as PWM, PPM or Manchester.")
+parser.add_argument("--min_gap", type=int, help="Zero bits that separate two bursts in a capture (default 12).")
+parser.add_argument("--min_burst", type=int, help="Shortest burst in bits kept when splitting captures (default 24).")
+parser.add_argument("--min_gap_time", type=float, help="Seconds of silence that separate two bursts, at the -B baud rate.")
+parser.add_argument("--min_burst_time", type=float, help="Shortest burst in seconds kept when splitting captures, at the -B baud rate.")
+parser.add_argument("--profile", nargs='?', const="./scanning_logs/metrics.prom", help="Record receive path metrics to a Prometheus text file, or JSON for a .json path (default ./scanning_logs/metrics.prom).")
+parser.add_argument("--profile_interval", default=5.0, type=float, help="Seconds between refreshes of the --profile file.")
+parser.add_argument("--unattended", action='store_true', help="Capture without prompting, keeping what the capture rules allow (with -i, save the first capture without asking).")
+parser.add_argument("--rules", help="Capture rules file of key: value lines for --unattended (see unattended.CaptureRules).")
+parser.add_argument("--dedup_window", default=1.0, type=float, help="Seconds over which repeats of a capture are logged as one record with a count, 0 to log every copy.")
+parser.add_argument("--dedup_span", default=200000, type=int, help="Hz apart repeats may be heard during a scan and still be merged.")
+parser.add_argument("--library", nargs='?', const="./device_templates/references.jsonl", help="Reference library of labeled remotes that -c and scans classify captures against (default ./device_templates/references.jsonl).")
+parser.add_argument("--add_reference", help="Add the -u payload to the reference library under this label.")
+parser.add_argument("--classify", action='store_true', help="Rank the reference library's labels against the -u payload, or every capture in the -o log.")
+parser.add_argument("--top", default=3, type=int, help="Number of reference library labels shown for each capture.")
+parser.add_argument("--cache_dir", default="./analysis_cache", help="Directory where -g and -c keep segmentations, scores and images to reuse.")
+parser.add_argument("--cache_size", default=256, type=int, help="Megabytes the analysis cache is kept under, least recently used entries are removed first.")
+parser.add_argument("--no_cache", action='store_true', help="Analyse everything again without reading or writing the analysis cache.")
+parser.add_argument("--max_captures", type=int, help="Stop unattended capture after keeping this many captures.")
+parser.add_argument("--duration", type=float, help="Stop unattended capture after this many seconds.")
+parser.add_argument("--min_length", type=int, help="Shortest capture in bits kept by unattended capture.")
+parser.add_argument("--max_length", type=int, help="Longest capture in bits kept by unattended capture.")
+parser.add_argument("--freq_range", nargs=2, type=int, help="Only export or graph captures between two frequencies (e.g., 433000000 434000000).")
+
+# Set by main() once the command line has been parsed
+args = None
+rf_settings = None
+
+#-----------------Radio Setup ----------------#
+def openRadio():
+    """Opens and configures the RfCat device, exiting if it cannot be initialized."""
+    import devices
+    import RFFunctions as tools
+    try:
+        d = devices.openDevice(0, args.simulate, args.speed)
+        tools.configureDevice(d, rf_settings, args.load_device_settings)
+        return d
+    except Exception as e:
+        print(f"Error initializing RF device: {e}")
+        sys.exit(1)
+
+def openScanOutputs(findDevices, capture_store=None):
+    """Opens the capture store, and similarity index if asked for, that a scan records into,
+    and sets how repeated captures are merged."""
+    findDevices.openCaptureStore(capture_store or args.capture_store, rf_settings)
+    findDevices.dedup_window = args.dedup_window
+    findDevices.dedup_span = args.dedup_span
+    findDevices.reference_library = openLibrary()
+    if args.similarity_index:
+        findDevices.openSimilarityIndex(args.similarity_index)
+
+def openLibrary():
+    """Loads the reference library given with --library, or the default one when adding or
+    classifying, otherwise returns None."""
+    if args.library is None and args.add_reference is None and not args.classify:
+        return None
+    from ReferenceLibrary import ReferenceLibrary, DEFAULT_PATH
+    library = ReferenceLibrary(args.library or DEFAULT_PATH)
+    print(f"Reference library {library.path} holds {len(library)} captures")
+    return library
+
+def openAnalysisCache():
+    """Opens the analysis cache unless --no_cache was given."""
+    if args.no_cache:
+        return None
+    from AnalysisCache import AnalysisCache
+    return AnalysisCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+def closeScanOutputs(findDevices):
+    findDevices.closeCaptureStore()
+    findDevices.closeSimilarityIndex()
+
+def multiDevice():
+    """True when the scan is spread across several YardSticks."""
+    return args.device_indexes is not None and len(args.device_indexes) > 1
+
+def parallelScan(**scan):
+    """Runs a scan with one worker per YardStick listed in -I."""
+    import multiScan
+    import devices
+    openScanOutputs(multiScan.findDevices)
+    multiScan.parallelScan(args.device_indexes, rf_settings,
+                           open_device=lambda idx: devices.openDevice(idx, args.simulate, args.speed), **scan)
+    closeScanOutputs(multiScan.findDevices)
+
+#-----------------Modes ----------------#
+def rollingCodeMode(d):
+    import attacks
+    print("Don't forget to change the default frequency and modulation type")
+    attacks.rollingCode(d, rf_settings, args.rolling_code, args.jamming_variance)
+
+def knownScannerMode(d):
+    import findDevices
+    if args.compare:
+        print("Uses lowercase f parameter to specify a single value frequency list")
+    else:
+        print("For a custom list, use the -f option in the format -f 433000000 314000000 390000000")
+        if multiDevice():
+            parallelScan(frequencies=args.list)
+            return
+    openScanOutputs(findDevices)
+    findDevices.searchKnownFreqs(d, args.list, args.compare)
+    closeScanOutputs(findDevices)
+
+def bruteScannerMode(d):
+    import findDevices
+    if args.increment_value is None:
+        print("Bruteforcing requires -v argument for an incrementing interval value (e.g., 500000)")
+        return
+    if multiDevice():
+        parallelScan(interval=args.increment_value, end_freq=args.end_frequency)
+        return
+    openScanOutputs(findDevices)
+    if args.rssi_sweep:
+        findDevices.rssiSweep(d, rf_settings, args.increment_value, args.end_frequency or findDevices.SWEEP_END,
+                               args.sweep_threshold, passes=args.sweep_passes)
+    else:
+        findDevices.bruteForceFreq(d, rf_settings, args.increment_value)
+    closeScanOutputs(findDevices)
+
+def jammerMode(d):
+    import jam
+    j = jam.setupJammer(0, rf_settings)
+    jam.jamming(j, "start", rf_settings, args.rolling_code)
+
+def unattendedMode(d):
+    import unattended
+    rules = unattended.CaptureRules()
+    try:
+        if args.rules:
+            rules.loadRulesFile(args.rules)
+        for key in ("max_captures", "duration", "min_length", "max_length"):
+            rules.set(key, getattr(args, key))
+    except (OSError, ValueError) as e:
+        print(f"Error loading capture rules: {e}")
+        return
+    openScanOutputs(unattended.findDevices, args.capture_store or rules.store)
+    unattended.captureUnattended(d, rules, rf_settings)
+    closeScanOutputs(unattended.findDevices)
+
+def instantReplayMode(d):
+    import attacks
+    attacks.replayLiveCapture(d, args.rolling_code, rf_settings, interactive=not args.unattended)
+
+def sendMode(d):
+    import attacks
+    if args.uploaded_payload is None:
+        print("Send requires -u argument for an upload file path (e.g., ./captures/payload.cap)")
+    else:
+        attacks.replaySavedCapture(d, args.uploaded_payload)
+
+def saveSettingsMode(d):
+    device_name = input("What would you like to name the device template: ")
+    rf_settings.saveDeviceSettingsTemplate(device_name)
+
+def compareMode(d):
+    import RFFunctions as tools
+    import Clicker
+    import utilities
+    my_clicker = Clicker.Clicker(tools.loadCapturePayload(args.uploaded_payload), cache=openAnalysisCache()) if args.uploaded_payload is not None else None
+    utilities.logTail(my_clicker, library=openLibrary(), top=args.top)
+
+def graphMode(d):
+    import RFFunctions as tools
+    import Clicker
+    import batchRender
+    cache = openAnalysisCache()
+    if args.compare_log is not None:
+        if cache is None:
+            # Without a cache the log is streamed and never held in memory as a whole
+            presses = (segments for _, segments in tools.iterSignalsFromLog(args.compare_log, freq_range=args.freq_range))
+        else:
+            presses = [segments for _, segments in tools.loadSignalsFromLog(args.compare_log, cache, freq_range=args.freq_range)]
+        my_clicker = Clicker.Clicker(tools.loadCapturePayload(args.uploaded_payload), presses, cache=cache)
+        my_clicker.createImageGraphBatch(args.render_workers)
+    else:
+        my_clicker = Clicker.Clicker(tools.loadCapturePayload(args.uploaded_payload))
+        batchRender.renderBatch(my_clicker.capturedBits(), [('./imageOutput/Graph1.png', 0)], 1, verbose=False, cache=cache)
+        my_clicker.openImage('./imageOutput/Graph1.png')
+    if cache is not None:
+        print(cache.describe())
+
+def decodeMode(d):
+    import RFFunctions as tools
+    import pulseDecoder
+    if args.compare_log is not None:
+        for frequency, segments in tools.iterSignalsFromLog(args.compare_log, freq_range=args.freq_range):
+            for segment, decoded in zip(segments, pulseDecoder.decodeBatch(segments)):
+                if decoded.bits is not None:
+                    print(f"{frequency} {decoded.encoding} period {decoded.period:g} x{decoded.frames}: {decoded.bits}")
+        return
+    if args.uploaded_payload is None:
+        print("Decoding requires -u argument for a payload file or -o argument for a scanning log")
+        return
+    payload = tools.loadCapturePayload(args.uploaded_payload)
+    decoded = pulseDecoder.decode(payload)
+    print(f"Encoding: {decoded.encoding}, symbol period: {decoded.period:g} samples, frames agreeing: {decoded.frames}")
+    print(f"Data bits: {decoded.bits}")
+    switches = pulseDecoder.dipSwitches(payload)
+    if switches is not None:
+        print(f"Dip switches: {':'.join(switches)}")
+
+def libraryMode(d):
+    import RFFunctions as tools
+    library = openLibrary()
+    if args.add_reference is not None:
+        if args.uploaded_payload is None:
+            print("Adding a reference requires -u argument for a payload file")
+            return
+        library.add(args.add_reference, tools.loadCapturePayload(args.uploaded_payload), args.frequency)
+        print(f"Added {args.uploaded_payload} to {library.path} as {args.add_reference}")
+    if not args.classify:
+        return
+    if args.compare_log is not None:
+        for frequency, segments in tools.iterSignalsFromLog(args.compare_log, freq_range=args.freq_range):
+            if segments:
+                print(f"{frequency}: " + library.describe(library.classify(segments, args.top)))
+    elif args.uploaded_payload is not None:
+        print(library.describe(library.classify(tools.loadCapturePayload(args.uploaded_payload), args.top)))
+    else:
+        print("Classifying requires -u argument for a payload file or -o argument for a scanning log")
+
+def deBruijnMode(d):
+    import attacks
+    attacks.deBruijn(d)
+
+def storeMode(d):
+    from CaptureStore import CaptureStore
+    if args.capture_store is None:
+        print("Importing and exporting requires -O argument for a capture store path (e.g., ./scanning_logs/captures.store)")
+        return
+    with CaptureStore(args.capture_store) as store:
+        if args.import_log:
+            print(f"Imported {store.importTextLog(args.import_log, rf_settings=rf_settings)} captures from {args.import_log}")
+        if args.import_cap:
+            print(f"Imported {store.importCapFile(args.import_cap, rf_settings.frequency, rf_settings=rf_settings)} captures from {args.import_cap}")
+        if args.export_log:
+            print(f"Exported {store.exportTextLog(args.export_log, freq_range=args.freq_range)} captures to {args.export_log}")
+        if args.export_cap:
+            print(f"Exported {store.exportCapFile(args.export_cap, freq_range=args.freq_range)} captures to {args.export_cap}")
+
+def similarityMode(d):
+    from SimilarityIndex import SimilarityIndex
+    import RFFunctions as tools
+    with SimilarityIndex(args.similarity_index) as index:
+        if args.import_log:
+            for frequency, segments in tools.iterSignalsFromLog(args.import_log):
+                index.addSegments(segments, frequency)
+            print(f"Similarity index {args.similarity_index} holds {len(index)} captures")
+        if args.similar and args.uploaded_payload is not None:
+            for entry_id, score in index.topK(tools.loadCapturePayload(args.uploaded_payload), args.similar):
+                print(f"{score * 100:6.2f}%  {index.describe(entry_id)}")
+        if args.clusters is not None:
+            for number, family in enumerate(index.clusters(args.clusters)):
+                print(f"Family {number}: {len(family)} captures, e.g. {index.describe(family[0])}")
+
+#-----------------Main ----------------#
+def main():
+    """Parses the command line, sets up the radio settings and runs every selected mode.
+    Kept behind the __main__ guard so render worker processes can import this file."""
+    global args, rf_settings
+    args = parser.parse_args()
+
+    # Initialize RFSettings object
+    rf_settings = RFSettings.RFSettings(
+        frequency=args.frequency,
+        baud_rate=args.baud_rate,
+        channel_bandwidth=args.channel_bandwidth,
+        modulation_type=args.modulation_type,
+        upper_rssi=args.upper_rssi,
+        lower_rssi=args.lower_rssi,
+        channel_spacing=args.channel_spacing,
+        deviation=args.deviation
+    )
+
+    # Load device settings from a file if specified
+    if args.load_device_settings:
+        try:
+            with open(args.load_device_settings) as f:
+                file_data = f.readlines()
+                rf_settings.loadDeviceSettingsTemplate(file_data)
+        except Exception as e:
+            print(f"Error loading device settings: {e}")
+            sys.exit(1)
+
+    # Metrics are only recorded when asked for.
+    if args.profile:
+        import metrics
+        metrics.startExporter(args.profile, args.profile_interval)
+
+    # Burst splitting thresholds, only set up when asked for so numpy is not loaded otherwise
+    if any(value is not None for value in (args.min_gap, args.min_burst, args.min_gap_time, args.min_burst_time)):
+        import RFFunctions as tools
+        tools.burstSegmenter.configure(args.min_gap, args.min_burst, rf_settings.baud_rate,
+                                       args.min_gap_time, args.min_burst_time)
+
+    # Modes in the order they run: (selected, needs the radio, handler)
+    MODES = [
+        (args.rolling_code, True, rollingCodeMode),
+        (args.known_scanner, not multiDevice() or args.compare, knownScannerMode),
+        (args.brute_scanner, not multiDevice(), bruteScannerMode),
+        (args.jammer, False, jammerMode),
+        (args.instant_replay, True, instantReplayMode),
+        (args.unattended and not (args.instant_replay or args.known_scanner or args.brute_scanner), True, unattendedMode),
+        (args.send, True, sendMode),
+        (args.save_device_settings, False, saveSettingsMode),
+        (args.compare and (args.uploaded_payload is not None or args.library is not None), False, compareMode),
+        (args.graph_signal and args.uploaded_payload is not None, False, graphMode),
+        (args.de_bruijn, True, deBruijnMode),
+        (args.decode, False, decodeMode),
+        (args.add_reference or args.classify, False, libraryMode),
+        ((args.import_log and (args.capture_store or not args.similarity_index)) or args.import_cap or args.export_log or args.export_cap, False, storeMode),
+        (args.similarity_index and not (args.known_scanner or args.brute_scanner), False, similarityMode),
+    ]
+
+    selected = [(needs_radio, handler) for chosen, needs_radio, handler in MODES if chosen]
+
+    # Initialize the RfCat device only if a selected mode transmits or receives
+    d = None
+    if any(needs_radio for needs_radio, _ in selected) and not args.jammer and not args.no_instance:
+        d = openRadio()
+
+    for _, handler in selected:
+        handler(d)
+
+    if d is not None:
+        import RFFunctions as tools
+        print(tools.RadioConfig.of(d).describe())
+
+    if args.profile:
+        metrics.stopExporter()
+        print(f"Saved metrics as: {args.profile}")
+
+    if args.startup_time:
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(f"Startup and run took {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        print(f"Heavy modules imported: {', '.join(loaded) if loaded else 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import numpy as np
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import metrics
+sys.dont_write_bytecode = True
+
+# Part of every key. Bump it whenever parsing, splitting, scoring or drawing changes what
+# an analysis produces, so entries made by the old code are never returned again.
+ANALYSIS_VERSION = 1
+
+DEFAULT_PATH = os.path.join(".", "analysis_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class AnalysisCache:
+    """On-disk cache of derived analysis: burst segmentations, similarity scores and rendered
+    images. Entries are content addressed, keyed by a SHA-256 of ANALYSIS_VERSION, the kind of
+    analysis, the payloads it was made from and its parameters, so the same capture set
+    analysed the same way hits the cache whatever file it came from. Entries are least
+    recently used first out once the cache grows past max_bytes."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """Opens the cache directory, creating it if needed.
+
+        Args:
+            path (str): Directory the entries are kept in.
+            max_bytes (int): Size the entries are trimmed back to.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+        # Entry name to [last use, size], rebuilt from the files so other runs' entries count
+        self.entries = {}
+        self.size = 0
+        for entry in os.scandir(path):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                self.entries[entry.name] = [stat.st_mtime, stat.st_size]
+                self.size += stat.st_size
+
+    def __len__(self):
+        return len(self.entries)
+
+    #------------ Keys --------------------#
+    @staticmethod
+    def key(kind, payloads, **params):
+        """Returns the key of an analysis.
+
+        Args:
+            kind (str): What the entry holds, such as "segments" or "graph".
+            payloads (list): The bytes, text or arrays the analysis was made from, in order.
+            params: Everything else that changes the result, in any order.
+        """
+        digest = hashlib.sha256(f"{ANALYSIS_VERSION}\0{kind}\0".encode())
+        for payload in payloads:
+            if isinstance(payload, np.ndarray):
+                payload = np.ascontiguousarray(payload).tobytes()
+            elif isinstance(payload, str):
+                payload = payload.encode()
+            # Length first so neighbouring payloads cannot run into each other
+            digest.update(len(payload).to_bytes(8, 'little'))
+            digest.update(payload)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return f"{kind}-{digest.hexdigest()}"
+
+    #------------ Reading and writing --------------------#
+    def entryPath(self, key):
+        return os.path.join(self.path, key)
+
+    def record(self, key, hit):
+        """Counts a lookup, marking a hit as just used."""
+        kind = key.split("-", 1)[0]
+        if hit:
+            self.touch(key)
+            self.hits += 1
+            metrics.inc('analysis_cache_hits_total', kind=kind)
+        else:
+            self.misses += 1
+            metrics.inc('analysis_cache_misses_total', kind=kind)
+        return hit
+
+    def forget(self, key):
+        """Drops an entry whose file has gone, for example trimmed by another run sharing the directory."""
+        self.size -= self.entries.pop(key)[1]
+
+    def get(self, key):
+        """Returns the bytes stored under key, or None."""
+        if not self.record(key, key in self.entries):
+            return None
+        try:
+            with open(self.entryPath(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            self.forget(key)
+            return None
+
+    def fits(self, size):
+        """True if an entry of size bytes can be kept without being trimmed straight away."""
+        return size <= self.max_bytes
+
+    def put(self, key, data):
+        """Stores bytes under key atomically, then trims the cache back to max_bytes. Data
+        larger than the whole cache is not stored."""
+        if not self.fits(len(data)):
+            return
+        temp_path = f"{self.entryPath(key)}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self.entryPath(key))
+        if key in self.entries:
+            self.size -= self.entries[key][1]
+        self.entries[key] = [0, len(data)]
+        self.size += len(data)
+        self.touch(key)
+        self.trim()
+
+    def touch(self, key):
+        """Marks an entry as just used, in memory and in its file's modification time."""
+        try:
+            os.utime(self.entryPath(key))
+            self.entries[key][0] = os.stat(self.entryPath(key)).st_mtime
+        except FileNotFoundError:
+            pass
+
+    def trim(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        if self.size <= self.max_bytes:
+            return
+        for key, (_, size) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(self.entryPath(key))
+            except FileNotFoundError:
+                pass
+            del self.entries[key]
+            self.size -= size
+            metrics.inc('analysis_cache_evictions_total')
+
+    #------------ Typed entries --------------------#
+    def getArray(self, key):
+        """Returns the numpy array stored under key, or None."""
+        data = self.get(key)
+        return None if data is None else np.load(io.BytesIO(data), allow_pickle=False)
+
+    def putArray(self, key, array):
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(array), allow_pickle=False)
+        self.put(key, buffer.getvalue())
+
+    def getJson(self, key):
+        """Returns the JSON value stored under key, or None."""
+        data = self.get(key)
+        return None if data is None else json.loads(data)
+
+    def putJson(self, key, value):
+        self.put(key, json.dumps(value, separators=(",", ":")).encode())
+
+    def getFile(self, key, path):
+        """Copies the file stored under key to path atomically, so a viewer showing path never
+        sees half an image. Returns False if there is none."""
+        if not self.record(key, key in self.entries):
+            return False
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(self.entryPath(key), temp_path)
+        except FileNotFoundError:
+            self.forget(key)
+            return False
+        os.replace(temp_path, path)
+        return True
+
+    def putFile(self, key, path):
+        """Stores a copy of the file at path under key."""
+        with open(path, 'rb') as f:
+            self.put(key, f.read())
+
+    def describe(self):
+        return (f"Analysis cache {self.path}: {self.hits} hits, {self.misses} misses, "
+                f"{len(self.entries)} entries using {self.size / 1048576:.1f} of {self.max_bytes / 1048576:.0f} MB")
+
+
+#------------ Helpers --------------------#
+def fileDigest(path, chunk_size=1 << 20):
+    """Returns the SHA-256 of a file's contents, read a chunk at a time."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
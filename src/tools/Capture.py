@@ -0,0 +1,99 @@
+import sys
+sys.dont_write_bytecode = True
+
+class Capture:
+    """A single RFrecv capture: the raw bytes as received plus where and when they were heard.
+    The hex, bit and byte views are made on first use and kept, and the byte views share the
+    received buffer instead of copying it. The bit length is tracked separately from the
+    byte length so captures parsed from hex keep every leading zero and never gain trailing
+    padding bits."""
+
+    __slots__ = ('_data', 'bit_length', 'frequency', 'rssi', 'timestamp', 'repeats', 'last_timestamp', '_hex', '_bits')
+
+    def __init__(self, data, frequency=None, rssi=None, timestamp=None, bit_length=None):
+        """Wraps received bytes.
+
+        Args:
+            data (bytes): The capture as returned by RFrecv.
+            frequency (int): The frequency it was received on.
+            rssi (int): The signal strength as a negative integer.
+            timestamp (float): Host time it was received at.
+            bit_length (int): Number of meaningful bits, defaults to every bit of data.
+        """
+        self._data = data if isinstance(data, bytes) else bytes(data)
+        self.bit_length = len(self._data) * 8 if bit_length is None else bit_length
+        self.frequency = frequency
+        self.rssi = rssi
+        self.timestamp = timestamp
+        self.repeats = 1             # Copies merged into this capture by a Deduplicator
+        self.last_timestamp = None   # Host time of the last merged copy
+        self._hex = None
+        self._bits = None
+
+    @classmethod
+    def fromHex(cls, payload, frequency=None, rssi=None, timestamp=None):
+        """Builds a capture from hex text, keeping leading zeros and an odd final nibble."""
+        payload = payload.strip()
+        data = bytes.fromhex(payload + '0' if len(payload) % 2 else payload)
+        return cls(data, frequency, rssi, timestamp, bit_length=len(payload) * 4)
+
+    @classmethod
+    def fromBits(cls, bits, frequency=None, rssi=None, timestamp=None):
+        """Builds a capture from a numpy array of 0/1 values, keeping the array as its bit view.
+        The bytes are only packed from it when they are first needed."""
+        capture = cls(b"", frequency, rssi, timestamp, bit_length=len(bits))
+        capture._data = None
+        capture._bits = bits
+        return capture
+
+    @classmethod
+    def of(cls, payload):
+        """Returns payload if it is already a Capture, otherwise parses it as hex."""
+        return payload if isinstance(payload, cls) else cls.fromHex(payload)
+
+    #------------ Views --------------------#
+    @property
+    def view(self):
+        """A read-only memoryview of the raw bytes."""
+        return memoryview(bytes(self))
+
+    @property
+    def hex(self):
+        """The capture as lowercase hex text."""
+        if self._hex is None:
+            self._hex = bytes(self).hex()[:(self.bit_length + 3) // 4]
+        return self._hex
+
+    @property
+    def bits(self):
+        """The capture as a numpy array of 0/1 values, one element per bit."""
+        if self._bits is None:
+            import numpy as np
+            self._bits = np.unpackbits(np.frombuffer(self._data, dtype=np.uint8), count=self.bit_length)
+        return self._bits
+
+    def __bytes__(self):
+        if self._data is None:
+            import numpy as np
+            self._data = np.packbits(self._bits).tobytes()
+        return self._data
+
+    def __len__(self):
+        return (self.bit_length + 7) // 8 if self._data is None else len(self._data)
+
+    def __bool__(self):
+        return self.bit_length > 0
+
+    def __str__(self):
+        return self.hex
+
+    def __repr__(self):
+        return f"Capture({self.hex!r}, frequency={self.frequency}, rssi={self.rssi})"
+
+    def __eq__(self, other):
+        if isinstance(other, Capture):
+            return bytes(self) == bytes(other) and self.bit_length == other.bit_length
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((bytes(self), self.bit_length))
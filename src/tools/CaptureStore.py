@@ -0,0 +1,356 @@
+import numpy as np
+import json
+import os
+import re
+import struct
+import sys
+import time
+from collections import namedtuple
+from RFFunctions import FOUND_LINE
+sys.dont_write_bytecode = True
+
+# Data file layout: a short header followed by records of RECORD + raw payload bytes
+STORE_MAGIC = b'RFCS'
+STORE_VERSION = 1
+HEADER = struct.Struct('<4sH')
+# frequency, timestamp, rssi, settings id, payload length, repeat count, last repeat's timestamp,
+# payload length in bits
+RECORD = struct.Struct('<QdhIIIdI')
+
+# Index file layout: one fixed entry per record, in the order written, so it can be mapped
+# straight into numpy
+INDEX_DTYPE = np.dtype([('frequency', '<u8'), ('timestamp', '<f8'), ('offset', '<u8')])
+
+NO_RSSI = -32768
+NO_SETTINGS = 0xFFFFFFFF
+
+CaptureRecord = namedtuple('CaptureRecord', ['frequency', 'timestamp', 'rssi', 'settings', 'payload',
+                                             'repeats', 'last_timestamp', 'bit_length'], defaults=(1, None, None))
+
+class CaptureStore:
+    """Append-only binary store of captures. Each record keeps the frequency, host timestamp,
+    RSSI, the RFSettings in use and the raw bytes with their length in bits. A fixed-width
+    table of every record's frequency, time and offset sits next to the data file. Queries
+    binary search a copy of it sorted by frequency and time instead of re-reading the
+    captures themselves."""
+
+    def __init__(self, path: str):
+        """Opens or creates a capture store.
+
+        Args:
+            path (str): Path of the data file. The index and settings table are kept
+                alongside it as <path>.idx and <path>.settings.
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.settings_path = path + ".settings"
+        self.settings = []        # Settings dictionaries by id
+        self.settings_ids = {}    # JSON text of a settings dictionary to its id
+        self.sorted_index = None  # Index entries ordered by (frequency, timestamp), see sortedIndex
+
+        if not os.path.exists(self.path):
+            with open(self.path, 'wb') as file:
+                file.write(HEADER.pack(STORE_MAGIC, STORE_VERSION))
+            open(self.index_path, 'wb').close()
+        else:
+            self.checkHeader()
+
+        self.loadSettings()
+        self.repairIndex()
+        self.data_file = open(self.path, 'ab')
+        self.index_file = open(self.index_path, 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+
+    #------------ Opening and recovery --------------------#
+    def checkHeader(self):
+        """Raises a ValueError if the data file is not a capture store this version can read."""
+        with open(self.path, 'rb') as file:
+            header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{self.path} is not a readable capture store")
+        magic, version = HEADER.unpack(header)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{self.path} is not a readable capture store")
+
+    def loadSettings(self):
+        """Reads the settings table, one JSON dictionary per line."""
+        if not os.path.exists(self.settings_path):
+            open(self.settings_path, 'w').close()
+        with open(self.settings_path) as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    self.settings_ids[line] = len(self.settings)
+                    self.settings.append(json.loads(line))
+
+    def repairIndex(self):
+        """Adds index entries for records written after the index was last flushed, for example
+        when the program was killed between the two writes, and drops a torn final record."""
+        if not os.path.exists(self.index_path):
+            open(self.index_path, 'wb').close()
+        entries = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        offset = HEADER.size
+
+        with open(self.path, 'r+b') as data_file, open(self.index_path, 'r+b') as index_file:
+            index_file.truncate(entries * INDEX_DTYPE.itemsize)
+            if entries:
+                index_file.seek((entries - 1) * INDEX_DTYPE.itemsize)
+                last = np.frombuffer(index_file.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)[0]
+                offset = int(last['offset'])
+                data_file.seek(offset)
+                offset += RECORD.size + RECORD.unpack(data_file.read(RECORD.size))[4]
+
+            data_size = os.path.getsize(self.path)
+            index_file.seek(0, os.SEEK_END)
+            while offset + RECORD.size <= data_size:
+                data_file.seek(offset)
+                frequency, timestamp, _, _, length = RECORD.unpack(data_file.read(RECORD.size))[:5]
+                if offset + RECORD.size + length > data_size:
+                    break
+                index_file.write(np.array([(frequency, timestamp, offset)], dtype=INDEX_DTYPE).tobytes())
+                offset += RECORD.size + length
+
+            if offset < data_size:
+                data_file.truncate(offset)
+
+    #------------ Writing --------------------#
+    def settingsId(self, rf_settings):
+        """Returns the id of an RFSettings object (or dictionary) in the settings table,
+        adding it if it has not been seen before."""
+        if rf_settings is None:
+            return NO_SETTINGS
+        settings = rf_settings if isinstance(rf_settings, dict) else vars(rf_settings)
+        key = json.dumps(settings, sort_keys=True)
+        if key not in self.settings_ids:
+            with open(self.settings_path, 'a') as file:
+                file.write(key + "\n")
+            self.settings_ids[key] = len(self.settings)
+            self.settings.append(json.loads(key))
+        return self.settings_ids[key]
+
+    def append(self, frequency, payload, timestamp=None, rssi=None, rf_settings=None, repeats=1, last_timestamp=None,
+               bit_length=None):
+        """Appends one capture to the store.
+
+        Args:
+            frequency (int): The frequency the capture was received on.
+            payload (bytes or str): The raw capture bytes, or their hex text.
+            timestamp (float): Host time of the capture, defaults to now.
+            rssi (int): The signal strength, if known.
+            rf_settings (RFSettings): The settings in use when the capture was received.
+            repeats (int): Copies of the capture it stands for.
+            last_timestamp (float): Host time of the last copy.
+            bit_length (int): Meaningful bits in the payload, defaults to every bit of it, or
+                of the hex text if payload is text.
+        """
+        if isinstance(payload, str):
+            if bit_length is None:
+                bit_length = len(payload.strip()) * 4
+            payload = hexToBytes(payload)
+        if bit_length is None:
+            bit_length = len(payload) * 8
+        if timestamp is None:
+            timestamp = time.time()
+        if rssi is None:
+            rssi = NO_RSSI
+
+        offset = self.data_file.tell()
+        self.data_file.write(RECORD.pack(int(frequency), timestamp, int(rssi), self.settingsId(rf_settings), len(payload),
+                                         repeats, timestamp if last_timestamp is None else last_timestamp, bit_length))
+        self.data_file.write(payload)
+        self.index_file.write(np.array([(int(frequency), timestamp, offset)], dtype=INDEX_DTYPE).tobytes())
+
+    def appendCapture(self, capture, rf_settings=None):
+        """Appends a Capture along with its frequency, timestamp and RSSI."""
+        self.append(capture.frequency or 0, bytes(capture), capture.timestamp, capture.rssi, rf_settings,
+                    capture.repeats, capture.last_timestamp, capture.bit_length)
+
+    def flush(self, sync=False):
+        """Flushes pending records, forcing them to disk when sync is set. The data file is
+        always written out before the index so the index never points past the data."""
+        self.data_file.flush()
+        if sync:
+            os.fsync(self.data_file.fileno())
+        self.index_file.flush()
+        if sync:
+            os.fsync(self.index_file.fileno())
+
+    def close(self):
+        """Flushes and closes the store."""
+        if not self.data_file.closed:
+            self.flush()
+            self.data_file.close()
+            self.index_file.close()
+
+    #------------ Querying --------------------#
+    def loadIndex(self):
+        """Maps the index file into a numpy structured array, one entry per record in the
+        order they were written."""
+        self.index_file.flush()
+        if len(self) == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(self.index_path, dtype=INDEX_DTYPE, mode='r', shape=(len(self),))
+
+    def sortedIndex(self):
+        """Returns the index entries ordered by (frequency, timestamp). The order is kept
+        between queries and only worked out again once records have been added."""
+        index = self.loadIndex()
+        if self.sorted_index is None or len(self.sorted_index) != len(index):
+            self.sorted_index = index[np.lexsort((index['timestamp'], index['frequency']))]
+        return self.sorted_index
+
+    def select(self, frequency=None, freq_range=None, start=None, stop=None):
+        """Returns the index entries matching the filters without touching the data file.
+        The frequencies are found with a binary search of the sorted index, and so are the
+        times when a single frequency is asked for.
+
+        Args:
+            frequency (int): Only captures on exactly this frequency.
+            freq_range (tuple): Only captures with low <= frequency <= high.
+            start (float): Only captures at or after this host timestamp.
+            stop (float): Only captures before this host timestamp.
+
+        Returns:
+            np.ndarray: The matching index entries in the order they were written.
+        """
+        index = self.sortedIndex()
+        low, high = 0, len(index)
+        if frequency is not None:
+            low_freq, high_freq = freq_range if freq_range is not None else (frequency, frequency)
+            freq_range = (max(frequency, low_freq), min(frequency, high_freq))
+        if freq_range is not None:
+            low = np.searchsorted(index['frequency'], freq_range[0], 'left')
+            high = np.searchsorted(index['frequency'], freq_range[1], 'right')
+        entries = index[low:high]
+
+        if freq_range is not None and freq_range[0] == freq_range[1]:
+            # One frequency's entries are in time order
+            if start is not None:
+                entries = entries[np.searchsorted(entries['timestamp'], start, 'left'):]
+            if stop is not None:
+                entries = entries[:np.searchsorted(entries['timestamp'], stop, 'left')]
+        else:
+            mask = np.ones(len(entries), dtype=bool)
+            if start is not None:
+                mask &= entries['timestamp'] >= start
+            if stop is not None:
+                mask &= entries['timestamp'] < stop
+            entries = entries[mask]
+        return entries[np.argsort(entries['offset'], kind='stable')]
+
+    def query(self, frequency=None, freq_range=None, start=None, stop=None):
+        """Yields CaptureRecords matching the filters, see select for the arguments."""
+        entries = self.select(frequency, freq_range, start, stop)
+        self.data_file.flush()
+        with open(self.path, 'rb') as file:
+            for offset in entries['offset']:
+                file.seek(int(offset))
+                yield self.readRecord(file)
+
+    def readRecord(self, file):
+        """Reads the record at the current position of an open data file."""
+        (frequency, timestamp, rssi, settings_id, length,
+         repeats, last_timestamp, bit_length) = RECORD.unpack(file.read(RECORD.size))
+        settings = self.settings[settings_id] if settings_id != NO_SETTINGS else None
+        return CaptureRecord(frequency, timestamp, None if rssi == NO_RSSI else rssi, settings, file.read(length),
+                             repeats, last_timestamp, bit_length)
+
+    #------------ Import and export --------------------#
+    def importTextLog(self, log_file, timestamp=None, rf_settings=None):
+        """Imports a scanning log of "A signal was found on: <freq>" / <hex> line pairs.
+        The log's own name holds its start time, which is used when no timestamp is given.
+
+        Returns:
+            int: The number of captures imported.
+        """
+        if timestamp is None:
+            timestamp = logStartTime(log_file)
+        count = 0
+        frequency, repeats = 0, 1
+        with open(log_file, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                found = FOUND_LINE.match(line)
+                if found:
+                    frequency, repeats = parseFoundLine(found)
+                elif line:
+                    self.append(frequency, line.decode(), timestamp, rf_settings=rf_settings, repeats=repeats)
+                    count += 1
+        return count
+
+    def importCapFile(self, cap_file, frequency, timestamp=None, rf_settings=None):
+        """Imports a .cap file of hex payloads, one per line, received on a known frequency.
+
+        Returns:
+            int: The number of captures imported.
+        """
+        if timestamp is None:
+            timestamp = os.path.getmtime(cap_file)
+        count = 0
+        with open(cap_file) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.append(frequency, line, timestamp, rf_settings=rf_settings)
+                    count += 1
+        return count
+
+    def exportTextLog(self, log_file, **filters):
+        """Writes matching captures out in the scanning log text format and returns the count."""
+        count = 0
+        with open(log_file, 'w') as file:
+            for record in self.query(**filters):
+                file.write(foundLine(record.frequency, record.repeats, record.timestamp, record.last_timestamp) + recordHex(record) + "\n")
+                count += 1
+        return count
+
+    def exportCapFile(self, cap_file, **filters):
+        """Writes matching captures out as a .cap file of hex payloads and returns the count."""
+        count = 0
+        with open(cap_file, 'w') as file:
+            for record in self.query(**filters):
+                file.write(recordHex(record) + "\n")
+                count += 1
+        return count
+
+
+#------------ Helpers --------------------#
+def foundLine(frequency, repeats=1, first=None, last=None):
+    """Returns the "found" line written before a capture in a text scanning log."""
+    line = "A signal was found on: " + str(frequency)
+    if repeats > 1:
+        line += f" (repeated {repeats} times"
+        line += f" over {last - first:.2f}s)" if first is not None and last is not None else ")"
+    return line + "\n"
+
+def parseFoundLine(found):
+    """Returns the (frequency, repeats) of a FOUND_LINE match."""
+    return int(found.group(1)), int(found.group(2) or 1)
+
+def recordHex(record):
+    """Returns a record's payload as hex, without the padding nibble of an odd-length capture."""
+    text = record.payload.hex()
+    return text if record.bit_length is None else text[:(record.bit_length + 3) // 4]
+
+def hexToBytes(payload):
+    """Converts hex text to bytes, padding an odd trailing nibble with zero."""
+    payload = payload.strip()
+    if len(payload) % 2:
+        payload += '0'
+    return bytes.fromhex(payload)
+
+def logStartTime(log_file):
+    """Returns the start time encoded in a scanning log name (%Y_%m_%d_%H%M%S),
+    or the file's modification time if the name does not hold one."""
+    match = re.search(r'\d{4}_\d{2}_\d{2}_\d{6}', os.path.basename(log_file))
+    if match:
+        return time.mktime(time.strptime(match.group(0), '%Y_%m_%d_%H%M%S'))
+    return os.path.getmtime(log_file)
@@ -1,143 +1,188 @@
-import matplotlib.pyplot as plt
-import matplotlib.pylab as pylab
-import numpy as np
-import sys
-import subprocess
-import RFFunctions as tools
-
-# Disable bytecode generation
-sys.dont_write_bytecode = True
-
-# Setup Graphing Size
-fig_size = plt.rcParams["figure.figsize"]
-fig_size[0] = 8
-fig_size[1] = 3
-plt.rcParams["figure.figsize"] = fig_size
-
-# Clicker Class for RF Signal Analysis and Visualization
-class Clicker:
-    """This class is used to help identify and analyze signals as well as create clickers
-    from captures. It uses a known payload and live captures or a logfile of unknown payloads to compare."""
-    
-    def __init__(self, captured_payload, keyfob_payloads=[]):
-        self.captured_payload = captured_payload
-        self.keyfob_payloads = keyfob_payloads
-        # Print statement describing the purpose of this Clicker instance
-        print("Clicker instance created: ready to analyze and compare RF signals.")
-
-    def determineDipSwitches(self, captured_payload):
-        """This function will return the dip switches as up:down:down:up format based on signal analysis"""
-        pass
-
-    def liveClicks(self):
-        """Compare signals and create graphs to compare a live capture with a keyfob press"""
-        live = True
-        graph_to_percent = {}  # Holds % match and payload for each signal in a click
-
-        # Get binary output of the payload
-        captured_payload_binary = self.payloadsToBinary(self.captured_payload)
-        print("----------Start Signals On Press--------------")
-        
-        for presses in self.keyfob_payloads:
-            for keyfob_payload in presses:
-                percent = self.convertAndCompare(self.captured_payload, keyfob_payload)
-                graph_to_percent[keyfob_payload] = percent
-                print("Percent Chance of Match for press is: {:.2f}".format(percent))
-        
-        print("----------End Signals On Press------------")
-        
-        # Send dictionaries of percents and return the signal with the highest % comparison
-        keyfob_payload = self.getHighestPercent(graph_to_percent)
-        keyfob_programming_binary = self.payloadsToBinary(keyfob_payload)
-
-        self.createGraph(captured_payload_binary, keyfob_programming_binary)
-        self.outputImagesComparisons(1, live)
-        plt.close()
-        self.openImage('./imageOutput/LiveComparison.png')
-
-        print("For Visual of the last signal comparison go to ./imageOutput/LiveComparison.png")
-
-    def createImageGraph(self):
-        """Create a graph to compare a list of captures with the keyfob press"""
-        count = 0
-
-        # Get binary output of the payload
-        captured_payload_binary = self.payloadsToBinary(self.captured_payload)
-
-        for presses in self.keyfob_payloads:
-            for keyfob_payload in presses:
-                percent = self.convertAndCompare(self.captured_payload, keyfob_payload)
-                print("Percent Chance of Match for press is: {:.2f}".format(percent))
-
-                self.createGraph(captured_payload_binary, self.payloadsToBinary(keyfob_payload))
-                self.outputImagesComparisons(count)
-                count += 1
-                plt.close()
-
-    def setupNumberPrinting(self, captured_payload_binary, keyfob_programming_binary):
-        """Prints numbers under the graph, reduces the counts in half for readability with a counter"""
-        count = 0
-        for tbit, bit in enumerate(captured_payload_binary):
-            if count % 2 != 1:
-                plt.text(tbit + 0.5, 3.5, str(bit))
-            count += 1
-
-        count = 0
-        for tbit, bit in enumerate(keyfob_programming_binary):
-            if count % 2 != 1:
-                plt.text(tbit + 0.5, 1.5, str(bit))
-            count += 1
-
-    def outputImagesComparisons(self, count, live=False):
-        """Outputs image files to compare capture to keyfob presses"""
-        if live:
-            pylab.savefig("./imageOutput/LiveComparison.png")
-        else:
-            pylab.savefig("./imageOutput/Graph" + str(count) + ".png")
-
-    def payloadsToBinary(self, payload):
-        """Converts hex data into binary and back into lists of binary numbers"""
-        binary = bin(int(payload, 16))[2:]
-        results = list(map(int, list(str(binary))))
-        return results
-
-    def getHighestPercent(self, myDictionary):
-        """Takes a dictionary of signals as keys and returns the signal with the highest percent value"""
-        highest_percent = max(zip(myDictionary.values(), myDictionary.keys()))
-        return highest_percent[1]
-
-    def openImage(self, path):
-        """Opens an image from the hard drive based on the path sent in"""
-        try:
-            image_viewer = {
-                'linux': 'eog',
-                'linux2': 'eog',
-                'win32': 'explorer',
-                'darwin': 'open'
-            }.get(sys.platform, 'eog')  # Default to eog for unknown platforms
-            subprocess.call([image_viewer, path])
-        except Exception as e:
-            print(f"Failed to open image: {e}")
-
-    def createGraph(self, captured_payload_binary, keyfob_programming_binary):
-        """Sets up the graphing elements for images or display, requires 2 binary payloads to plot"""
-        payload_data = np.repeat(captured_payload_binary, 2)
-        keyfob_data = np.repeat(keyfob_programming_binary, 2)
-        t = 0.5 * np.arange(len(payload_data))
-        u = 0.5 * np.arange(len(keyfob_data))
-
-        # Used to show the waveform
-        plt.step(t, payload_data + 4, 'r', linewidth=2, where='post')
-        plt.step(u, keyfob_data + 2, 'r', linewidth=2, where='post')
-
-        # Limit the height of the waveform and turns off axis lines
-        plt.ylim([-1, 6])
-        plt.gca().axis('off')
-
-    def convertAndCompare(self, payload1, payload2):
-        """Convert payloads to binary and compare them, returning the match percentage."""
-        binary1 = self.payloadsToBinary(payload1)
-        binary2 = self.payloadsToBinary(payload2)
-        one = ''.join(str(x) for x in binary1)
-        two = ''.join(str(x) for x in binary2)
-        return tools.similar(one, two)
+import matplotlib.pyplot as plt
+import numpy as np
+import sys
+import bitCompare
+import batchRender
+import pulseDecoder
+import metrics
+from LiveRenderer import LiveRenderer, openViewer
+
+# Disable bytecode generation
+sys.dont_write_bytecode = True
+
+# Graphing Size
+FIGURE_SIZE = batchRender.FIGURE_SIZE
+
+# Clicker Class for RF Signal Analysis and Visualization
+class Clicker:
+    """This class is used to help identify and analyze signals as well as create clickers
+    from captures. It uses a known payload and live captures or a logfile of unknown payloads to compare."""
+    
+    def __init__(self, captured_payload, keyfob_payloads=[], render_interval=0.5, cache=None):
+        self.captured_payload = captured_payload
+        self.keyfob_payloads = keyfob_payloads
+        self.render_interval = render_interval  # Fewest seconds between live comparison images
+        self.renderer = None                    # LiveRenderer started by the first live click
+        self.cache = cache                      # Optional AnalysisCache for scores and images
+        # Print statement describing the purpose of this Clicker instance
+        print("Clicker instance created: ready to analyze and compare RF signals.")
+
+    def determineDipSwitches(self, captured_payload, switches=8):
+        """This function will return the dip switches as up:down:down:up format based on signal analysis.
+        Floating switches are shown as float, and None is returned if the payload cannot be decoded."""
+        states = pulseDecoder.dipSwitches(captured_payload, switches)
+        return ":".join(states) if states is not None else None
+
+    @property
+    def captured_payload(self):
+        return self._captured_payload
+
+    @captured_payload.setter
+    def captured_payload(self, payload):
+        self._captured_payload = payload
+        self._captured_bits = None
+        self._captured_binary = None
+
+    def capturedBits(self):
+        """Bits of the captured payload as a numpy array, parsed once and scored against every press"""
+        if self._captured_bits is None:
+            self._captured_bits = bitCompare.toBits(self.captured_payload)
+        return self._captured_bits
+
+    def capturedBinary(self):
+        """Binary of the captured payload, converted once and reused for every comparison"""
+        if self._captured_binary is None:
+            self._captured_binary = self.capturedBits().tolist()
+        return self._captured_binary
+
+    def liveClicks(self):
+        """Compare signals against a live keyfob press and update the live comparison image.
+        Match percentages are printed straight away. The image of the best match is drawn by
+        a background LiveRenderer, so a burst of presses only redraws the latest one.
+
+        Returns:
+            float: The highest match percentage of the press.
+        """
+        graph_to_percent = {}  # Holds % match and payload for each signal in a click
+
+        print("----------Start Signals On Press--------------")
+        
+        for keyfob_payload, percent in self.scorePresses():
+            graph_to_percent[keyfob_payload] = percent
+            print("Percent Chance of Match for press is: {:.2f}".format(percent))
+        
+        print("----------End Signals On Press------------", flush=True)
+        
+        # Send dictionaries of percents and return the signal with the highest % comparison
+        keyfob_payload = self.getHighestPercent(graph_to_percent)
+        if self.renderer is None:
+            self.renderer = LiveRenderer(self.capturedBinary(), min_interval=self.render_interval, cache=self.cache)
+        self.renderer.submit(self.payloadsToBinary(keyfob_payload))
+        return graph_to_percent[keyfob_payload]
+
+    def close(self):
+        """Finishes the last live comparison image and stops the renderer"""
+        if self.renderer is not None:
+            self.renderer.close()
+            print(self.renderer.describe())
+            self.renderer = None
+
+    def createImageGraph(self):
+        """Create a graph to compare a list of captures with the keyfob press"""
+        count = 0
+
+        # Get binary output of the payload
+        captured_payload_binary = self.capturedBinary()
+
+        for keyfob_payload, percent in self.scorePresses():
+            print("Percent Chance of Match for press is: {:.2f}".format(percent))
+
+            self.createGraph(captured_payload_binary, self.payloadsToBinary(keyfob_payload))
+            self.outputImagesComparisons(count)
+            count += 1
+            plt.close()
+
+    def createImageGraphBatch(self, workers=None, output_dir="./imageOutput"):
+        """Render comparison graphs for every keyfob press headlessly across a process pool.
+        Images are written as Graph<n>.png in the same order as createImageGraph. With an
+        AnalysisCache the scores and images of comparisons made before are reused. Jobs are
+        made as the renderer asks for them, with the bits of each payload as a uint8 array"""
+        def jobs():
+            for count, (keyfob_payload, percent) in enumerate(self.scorePressesCached()):
+                print("Percent Chance of Match for press is: {:.2f}".format(percent))
+                yield f"{output_dir}/Graph{count}.png", bitCompare.toBits(keyfob_payload)
+
+        return batchRender.renderBatch(self.capturedBits(), jobs(), workers, cache=self.cache)
+
+    def scorePressesCached(self):
+        """Same as scorePresses, but the scores of the whole set of payloads are kept in an
+        AnalysisCache under their content hash, so scoring the same set again is a lookup"""
+        cache = self.cache
+        if cache is None:
+            return self.scorePresses()
+        payloads = [keyfob_payload for presses in self.keyfob_payloads for keyfob_payload in presses]
+        key = cache.key("scores", [self.capturedBits()] + [bitCompare.toBits(payload) for payload in payloads],
+                        max_shift=bitCompare.DEFAULT_MAX_SHIFT)
+        scores = cache.getArray(key)
+        if scores is None:
+            scores = [percent for _, percent in self.scorePresses(presses=[payloads])]
+            cache.putArray(key, scores)
+        return zip(payloads, np.asarray(scores).tolist())
+
+    def scorePresses(self, chunk_size=4096, presses=None):
+        """Scores every keyfob payload against the captured payload in batches of chunk_size
+        and yields (payload, percent) pairs in press order. keyfob_payloads may be a generator,
+        such as one from RFFunctions.iterSignalsFromLog, and is only read one chunk at a time.
+        Other presses may be given instead of keyfob_payloads"""
+        if presses is None:
+            presses = self.keyfob_payloads
+        chunk = []
+        for press in presses:
+            chunk.extend(press)
+            if len(chunk) >= chunk_size:
+                yield from self.scoreChunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self.scoreChunk(chunk)
+
+    def scoreChunk(self, chunk):
+        """Scores a list of keyfob payloads against the captured payload's bits in one batch"""
+        with metrics.timed('stage_seconds', stage="compare"):
+            result = bitCompare.compareBatch(self.capturedBits(), chunk)
+        return zip(chunk, result.ratios.tolist())
+
+    def outputImagesComparisons(self, count, live=False):
+        """Outputs image files to compare capture to keyfob presses"""
+        if live:
+            plt.savefig("./imageOutput/LiveComparison.png")
+        else:
+            plt.savefig("./imageOutput/Graph" + str(count) + ".png")
+
+    def payloadsToBinary(self, payload):
+        """Converts a Capture or hex data into a list of binary numbers, keeping leading zeros"""
+        return bitCompare.toBits(payload).tolist()
+
+    def getHighestPercent(self, myDictionary):
+        """Takes a dictionary of signals as keys and returns the signal with the highest percent value"""
+        return max(myDictionary, key=myDictionary.get)
+
+    def openImage(self, path):
+        """Opens an image from the hard drive based on the path sent in, without waiting for the viewer to close"""
+        return openViewer(path)
+
+    def createGraph(self, captured_payload_binary, keyfob_programming_binary):
+        """Sets up the graphing elements for images or display, requires 2 binary payloads to plot.
+        The graph zooms onto the bursts, long captures are drawn as an envelope and bit values
+        are written underneath when they are legible, the same way batchRender draws them"""
+        plt.figure(figsize=FIGURE_SIZE)
+
+        # Limit the height of the waveform and turns off axis lines
+        plt.ylim([-1, 6])
+        plt.gca().axis('off')
+
+        # Used to show the waveform
+        batchRender.drawComparison(plt.gca(), captured_payload_binary, keyfob_programming_binary)
+
+    def convertAndCompare(self, payload1, payload2):
+        """Convert payloads to binary and compare them, returning the match percentage."""
+        return bitCompare.similarity(payload1, payload2)
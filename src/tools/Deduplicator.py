@@ -0,0 +1,113 @@
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+import metrics
+sys.dont_write_bytecode = True
+
+DEFAULT_WINDOW = 1.0        # Seconds a repeat may follow the previous copy and still be merged
+DEFAULT_SPAN = 200000       # Hz apart two frequencies may be and still hear the same transmission
+DEFAULT_MAX_ENTRIES = 1024  # Distinct payloads tracked at once
+
+class _Entry:
+    __slots__ = ('capture', 'last_seen', 'repeats', 'best_rssi')
+
+    def __init__(self, capture, now):
+        self.capture = capture
+        self.last_seen = now
+        self.repeats = 1
+        self.best_rssi = capture.rssi
+
+
+class Deduplicator:
+    """Collapses repeats of the same payload, such as a held keyfob button, into one capture.
+    Payloads are keyed by a hash of their bytes with the leading and trailing zero bytes
+    removed and kept in a bounded LRU. A copy arriving within window seconds of the previous
+    one, on the same frequency or one up to span Hz away, is counted instead of kept. A
+    capture is released once no copy has arrived for window seconds, or when it is evicted,
+    carrying its repeat count and the time of its last copy. A repeat heard more strongly on
+    a neighbouring brute force step moves the capture to that frequency."""
+
+    def __init__(self, window=DEFAULT_WINDOW, span=DEFAULT_SPAN, max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        """Sets up an empty window.
+
+        Args:
+            window (float): Seconds between copies for them to be merged.
+            span (int): Hz between frequencies for their copies to be merged.
+            max_entries (int): Payloads tracked before the least recently seen is released.
+            clock (function): The clock capture timestamps are taken on, which the window is
+                measured on too. Simulated radios stamp captures with devices.wallClock.
+        """
+        self.window = window
+        self.span = span
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()    # Payload key to _Entry, least recently seen first
+        self.hits = 0                   # Copies merged into an earlier capture
+        self.misses = 0                 # Captures kept as new records
+        self.adjacent = 0               # Hits that came from a different frequency
+
+    @staticmethod
+    def key(capture):
+        return hashlib.blake2b(bytes(capture).strip(b"\x00"), digest_size=16).digest()
+
+    def release(self, entry):
+        capture = entry.capture
+        capture.repeats = entry.repeats
+        capture.last_timestamp = entry.last_seen if entry.repeats > 1 else None
+        return capture
+
+    def add(self, captures, now=None):
+        """Feeds captures in and returns those released by doing so."""
+        released = []
+        for capture in captures:
+            seen = capture.timestamp if capture.timestamp is not None else self.clock()
+            key = self.key(capture)
+            entry = self.entries.get(key)
+            if entry is not None and seen - entry.last_seen <= self.window and (
+                    capture.frequency is None or entry.capture.frequency is None
+                    or abs(capture.frequency - entry.capture.frequency) <= self.span):
+                entry.repeats += 1
+                entry.last_seen = seen
+                if capture.frequency != entry.capture.frequency:
+                    self.adjacent += 1
+                    if capture.rssi is not None and (entry.best_rssi is None or capture.rssi > entry.best_rssi):
+                        entry.capture.frequency = capture.frequency
+                        entry.best_rssi = capture.rssi
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc('dedup_hits_total')
+                continue
+
+            if entry is not None:
+                released.append(self.release(self.entries.pop(key)))
+            self.entries[key] = _Entry(capture, seen)
+            self.misses += 1
+            metrics.inc('dedup_misses_total')
+            if len(self.entries) > self.max_entries:
+                released.append(self.release(self.entries.popitem(last=False)[1]))
+        return released + self.expire(now)
+
+    def expire(self, now=None):
+        """Releases every capture whose window has passed."""
+        if now is None:
+            now = self.clock()
+        released = []
+        while self.entries:
+            entry = next(iter(self.entries.values()))
+            if now - entry.last_seen <= self.window:
+                break
+            released.append(self.release(self.entries.popitem(last=False)[1]))
+        return released
+
+    def drain(self):
+        """Releases everything still being tracked."""
+        released = [self.release(entry) for entry in self.entries.values()]
+        self.entries.clear()
+        return released
+
+    def describe(self):
+        total = self.hits + self.misses
+        saved = 100.0 * self.hits / total if total else 0.0
+        return (f"Deduplicated {self.hits} of {total} captures ({saved:.1f}% fewer records, "
+                f"{self.adjacent} from neighbouring frequencies)")
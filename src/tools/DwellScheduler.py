@@ -0,0 +1,96 @@
+import time
+import sys
+sys.dont_write_bytecode = True
+
+class FrequencyStats:
+    """Hit statistics the scheduler keeps for one frequency."""
+
+    __slots__ = ('frequency', 'visits', 'hits', 'dwell_time', 'activity', 'last_visit', 'last_hit', 'updated')
+
+    def __init__(self, frequency, now):
+        self.frequency = frequency
+        self.visits = 0          # Times the frequency was listened to
+        self.hits = 0            # Captures received on it
+        self.dwell_time = 0.0    # Seconds spent listening to it
+        self.activity = 0.0      # Hit count decaying with the scheduler's half life
+        self.last_visit = None   # Scheduler clock at the end of the last visit
+        self.last_hit = None     # Scheduler clock of the last visit with a capture
+        self.updated = now       # When activity was last decayed
+
+    def decayedActivity(self, now, half_life):
+        return self.activity * 0.5 ** ((now - self.updated) / half_life)
+
+
+class DwellScheduler:
+    """Decides which known frequency to listen to next and for how long. Frequencies that
+    produced captures recently get longer dwells and are revisited sooner, in proportion to
+    their decaying hit count. Quiet frequencies still get the minimum dwell, and none goes
+    longer than max_revisit seconds without a visit."""
+
+    def __init__(self, frequencies, min_dwell=0.25, max_dwell=3.0, max_revisit=10.0, half_life=30.0, clock=time.monotonic):
+        """Sets up the schedule.
+
+        Args:
+            frequencies (list): The known frequencies to share the receiver between.
+            min_dwell (float): Seconds spent on a frequency with no recent hits.
+            max_dwell (float): Longest dwell an active frequency is given.
+            max_revisit (float): Longest a frequency may go unvisited.
+            half_life (float): Seconds for a hit's weight in the schedule to halve.
+            clock (function): Returns the current time in seconds.
+        """
+        self.min_dwell = min_dwell
+        self.max_dwell = max_dwell
+        self.max_revisit = max_revisit
+        self.half_life = half_life
+        self.clock = clock
+        now = clock()
+        self.stats = {freq: FrequencyStats(freq, now) for freq in dict.fromkeys(frequencies)}
+        self.order = list(self.stats)    # Unvisited frequencies go first, in the order given
+
+    def dwellFor(self, activity):
+        """Dwell for a frequency with the given activity, growing towards max_dwell."""
+        return self.min_dwell + (self.max_dwell - self.min_dwell) * activity / (activity + 1.0)
+
+    def next(self):
+        """Returns the (frequency, dwell seconds) to listen to next."""
+        now = self.clock()
+        for freq in self.order:
+            if self.stats[freq].last_visit is None:
+                return freq, self.min_dwell
+
+        overdue = [s for s in self.stats.values() if now - s.last_visit >= self.max_revisit]
+        if overdue:
+            stats = min(overdue, key=lambda s: s.last_visit)
+        else:
+            # Weight each frequency's waiting time by its activity; a small floor keeps quiet ones moving
+            stats = max(self.stats.values(),
+                        key=lambda s: (s.decayedActivity(now, self.half_life) + 0.05) * (now - s.last_visit))
+        return stats.frequency, self.dwellFor(stats.decayedActivity(now, self.half_life))
+
+    def record(self, frequency, hits, dwell_time):
+        """Records the outcome of listening to a frequency.
+
+        Args:
+            frequency (int): The frequency listened to.
+            hits (int): Captures received during the visit.
+            dwell_time (float): Seconds actually spent listening.
+        """
+        now = self.clock()
+        stats = self.stats[frequency]
+        stats.activity = stats.decayedActivity(now, self.half_life) + hits
+        stats.updated = now
+        stats.visits += 1
+        stats.hits += hits
+        stats.dwell_time += dwell_time
+        stats.last_visit = now
+        if hits:
+            stats.last_hit = now
+
+    def printStats(self):
+        """Prints the per-frequency statistics, most active first."""
+        now = self.clock()
+        print(f"{'Frequency':>12} {'Visits':>7} {'Hits':>6} {'Dwell(s)':>9} {'Activity':>9} {'Last hit':>9}")
+        for s in sorted(self.stats.values(), key=lambda s: -s.decayedActivity(now, self.half_life)):
+            last_hit = f"{now - s.last_hit:.1f}s" if s.last_hit is not None else "never"
+            print(f"{s.frequency:>12} {s.visits:>7} {s.hits:>6} {s.dwell_time:>9.1f} "
+                  f"{s.decayedActivity(now, self.half_life):>9.2f} {last_hit:>9}")
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import batchRender
+import metrics
+sys.dont_write_bytecode = True
+
+_STOP = object()
+
+class LiveRenderer:
+    """Background renderer for the live comparison image. The log tail hands it the bits of
+    the best matching press with submit(), which never blocks. Only the latest submission is
+    kept, so a burst of clicks is drawn once, and images are written at most once every
+    min_interval seconds. The image viewer is started once, after the first image is written,
+    and left running while later images replace the file it shows."""
+
+    def __init__(self, captured_bits, path="./imageOutput/LiveComparison.png", min_interval=0.5, open_viewer=True, cache=None):
+        """Starts the render thread.
+
+        Args:
+            captured_bits (list): Bits of the known payload, drawn on every image.
+            path (str): The image rewritten with each comparison.
+            min_interval (float): Fewest seconds between two renders.
+            open_viewer (bool): If True, the image viewer is launched after the first render.
+            cache (AnalysisCache): Optional cache of images, so a press seen before is copied
+                instead of drawn.
+        """
+        self.captured_bits = captured_bits
+        self.path = path
+        self.min_interval = min_interval
+        self.open_viewer = open_viewer
+        self.cache = cache
+        self.viewer = None       # The image viewer process once launched
+
+        self.lock = threading.Lock()
+        self.pending = None      # Latest bits waiting to be drawn
+        self.wakeup = threading.Event()
+        self.submitted = 0       # Comparisons handed to the renderer
+        self.rendered = 0        # Images actually written
+        self.coalesced = 0       # Comparisons replaced by a newer one before being drawn
+
+        self.thread = threading.Thread(target=self.run, name="LiveRenderer", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, keyfob_bits):
+        """Queues a comparison, replacing any that has not been drawn yet."""
+        with self.lock:
+            if self.pending is not None:
+                self.coalesced += 1
+                metrics.inc('live_renders_coalesced_total')
+            self.pending = keyfob_bits
+            self.submitted += 1
+        self.wakeup.set()
+
+    def run(self):
+        """Render thread: waits for a submission, holds off until min_interval has passed
+        since the last render and then draws whatever is latest."""
+        batchRender.initWorker(self.captured_bits)
+        last_render = None
+        while True:
+            self.wakeup.wait()
+            if last_render is not None:
+                time.sleep(max(0.0, self.min_interval - (time.monotonic() - last_render)))
+            with self.lock:
+                keyfob_bits, self.pending = self.pending, None
+                self.wakeup.clear()
+            if keyfob_bits is _STOP:
+                return
+            if keyfob_bits is None:
+                continue
+
+            with metrics.timed('stage_seconds', stage="live_render"):
+                key = batchRender.graphKey(self.cache, self.captured_bits, keyfob_bits) if self.cache is not None else None
+                if key is None or not self.cache.getFile(key, self.path):
+                    batchRender.renderComparison((self.path, keyfob_bits))
+                    if key is not None:
+                        self.cache.putFile(key, self.path)
+            last_render = time.monotonic()
+            self.rendered += 1
+            if self.open_viewer:
+                # Only ever one attempt, the viewer picks up later images itself
+                self.open_viewer = False
+                self.viewer = openViewer(self.path)
+                print("For Visual of the last signal comparison go to " + self.path)
+
+    def close(self):
+        """Draws the last pending comparison and stops the render thread. The viewer is left open."""
+        if not self.thread.is_alive():
+            return
+        # Let the thread take the final comparison before it sees the stop marker
+        while self.pending is not None and self.thread.is_alive():
+            time.sleep(0.01)
+        with self.lock:
+            self.pending = _STOP
+        self.wakeup.set()
+        self.thread.join()
+
+    def describe(self):
+        return f"Rendered {self.rendered} of {self.submitted} comparisons ({self.coalesced} coalesced)"
+
+
+#------------ Helpers --------------------#
+def openViewer(path):
+    """Launches the platform's image viewer on path without waiting for it to be closed.
+
+    Returns:
+        subprocess.Popen: The viewer process, or None if it could not be started.
+    """
+    image_viewer = {
+        'linux': 'eog',
+        'linux2': 'eog',
+        'win32': 'explorer',
+        'darwin': 'open'
+    }.get(sys.platform, 'eog')  # Default to eog for unknown platforms
+    try:
+        return subprocess.Popen([image_viewer, os.path.abspath(path)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except Exception as e:
+        print(f"Failed to open image: {e}")
+        return None
@@ -0,0 +1,143 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+sys.dont_write_bytecode = True
+
+# inotify event masks from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+class LogFollower:
+    """Follows a growing log file like tail -F. The follower sleeps until the kernel reports a
+    change in the log's directory (inotify on Linux) and falls back to polling elsewhere.
+    Every wakeup drains all complete lines appended since the last one as a single batch.
+    Truncation starts reading from the top again and rotation (the log being replaced by a
+    new file) reopens the path."""
+
+    def __init__(self, path, from_start=False, poll_interval=0.05, idle_timeout=1.0):
+        """Opens the log.
+
+        Args:
+            path (str): The log file to follow.
+            from_start (bool): If True, lines already in the log form the first batch.
+            poll_interval (float): Seconds between checks when notifications are unavailable.
+            idle_timeout (float): Longest wait on notifications before checking anyway.
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.partial = b""     # An appended line still waiting for its newline
+        self.file = None
+        self.inode = None
+        self.reopen(seek_end=not from_start)
+
+        self.inotify_fd = None
+        self.setupNotifications()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def setupNotifications(self):
+        """Watches the log's directory with inotify when the C library offers it."""
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK)
+            if fd < 0:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path)).encode()
+            if libc.inotify_add_watch(fd, directory, WATCH_MASK) < 0:
+                os.close(fd)
+                return
+            self.inotify_fd = fd
+        except (OSError, AttributeError):
+            self.inotify_fd = None
+
+    def reopen(self, seek_end=False):
+        """(Re)opens the log path, optionally starting at its current end."""
+        if self.file is not None:
+            self.file.close()
+        self.partial = b""
+        try:
+            self.file = open(self.path, 'rb')
+        except FileNotFoundError:
+            self.file, self.inode = None, None
+            return
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        if seek_end:
+            self.file.seek(0, os.SEEK_END)
+
+    def checkRotation(self):
+        """Reopens the log if it was replaced or truncated since the last read."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if self.file is None or stat.st_ino != self.inode:
+            # readLines has already drained the old file, carry on with the new one
+            self.reopen()
+        elif stat.st_size < self.file.tell():
+            self.file.seek(0)
+            self.partial = b""
+
+    def drain(self):
+        """Reads to the end of the open log and returns the complete lines found."""
+        if self.file is None:
+            return []
+        data = self.file.read()
+        if not data:
+            return []
+        *complete, self.partial = (self.partial + data).split(b"\n")
+        return [line.decode(errors='replace') for line in complete]
+
+    def readLines(self):
+        """Returns every complete line appended since the last call, including the tail
+        of a log that was rotated away and the start of its replacement."""
+        lines = self.drain()
+        self.checkRotation()
+        return lines + self.drain()
+
+    def wait(self, timeout):
+        """Sleeps until the log's directory changes or timeout seconds pass."""
+        if self.inotify_fd is None:
+            time.sleep(min(timeout, self.poll_interval))
+            return
+        ready, _, _ = select.select([self.inotify_fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.inotify_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def batches(self):
+        """Yields lists of newly appended lines for as long as the follower is iterated."""
+        while True:
+            lines = self.readLines()
+            if lines:
+                yield lines
+            else:
+                self.wait(self.idle_timeout)
+
+    def close(self):
+        """Stops watching and closes the log."""
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,167 @@
+import os
+import queue
+import sys
+import threading
+import time
+import metrics
+from CaptureStore import foundLine
+sys.dont_write_bytecode = True
+
+# Sync policies applied every flush_interval seconds
+SYNC_NONE = "none"      # Leave buffering to Python and the OS until close
+SYNC_FLUSH = "flush"    # Flush Python's buffers to the OS
+SYNC_FSYNC = "fsync"    # Flush and force the data onto the disk
+
+_STOP = object()
+
+class LogWriter:
+    """Background writer for scanning logs. The receive loop hands captures to submit(),
+    which never blocks: Captures go onto a bounded queue and a writer thread commits them
+    to the text log (and the capture store and similarity index, if given) in groups. When the queue is full
+    the capture is counted in overflows instead of stalling the radio. With a Deduplicator,
+    repeats of a capture are held back and written once as a single record with their count."""
+
+    def __init__(self, filename, store=None, rf_settings=None, max_queue=4096, batch_size=256,
+                 flush_interval=1.0, sync=SYNC_FLUSH, echo=True, index=None, dedup=None):
+        """Starts the writer thread.
+
+        Args:
+            filename (str): The text log to append to.
+            store (CaptureStore): Optional capture store that receives every capture too.
+            rf_settings (RFSettings): The settings recorded with each capture in the store.
+            max_queue (int): Captures that may wait for the writer before new ones are dropped.
+            batch_size (int): The most captures committed in a single write.
+            flush_interval (float): Seconds between applying the sync policy, 0 for every batch.
+            sync (str): One of SYNC_NONE, SYNC_FLUSH or SYNC_FSYNC.
+            echo (bool): If True, the writer thread prints each capture's hex.
+            index (SimilarityIndex): Optional similarity index that every capture is added to.
+            dedup (Deduplicator): Optional deduplicator captures pass through before being written.
+                Held captures are released at the latest one flush_interval after their window.
+        """
+        if sync not in (SYNC_NONE, SYNC_FLUSH, SYNC_FSYNC):
+            raise ValueError(f"Unknown sync policy: {sync}")
+        self.filename = filename
+        self.store = store
+        self.rf_settings = rf_settings
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.echo = echo
+        self.index = index
+        self.dedup = dedup
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0      # Captures committed to the log
+        self.batches = 0      # Group commits performed
+        self.overflows = 0    # Captures dropped because the queue was full
+
+        self.file = open(filename, 'a+')
+        self.thread = threading.Thread(target=self.run, name="LogWriter", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, capture):
+        """Queues a Capture for writing without blocking.
+
+        Returns:
+            bool: False if the queue was full and the capture was dropped.
+        """
+        try:
+            self.queue.put_nowait(capture)
+            metrics.setGauge('log_writer_queue_depth', self.queue.qsize())
+            return True
+        except queue.Full:
+            self.overflows += 1
+            metrics.inc('log_writer_dropped_total')
+            return False
+
+    def run(self):
+        """Writer thread: waits for a capture, drains whatever else is queued and commits it as one group."""
+        last_sync = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval or self.idleTimeout())]
+            except queue.Empty:
+                batch = []
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if _STOP in batch:
+                batch.remove(_STOP)
+                stopping = True
+                # Drain anything that was queued behind the stop marker
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+
+            if self.dedup is not None:
+                batch = self.dedup.add(batch)
+                if stopping:
+                    batch += self.dedup.drain()
+
+            if batch:
+                with metrics.timed('stage_seconds', stage="log_write"):
+                    self.commit(batch)
+                metrics.inc('log_writer_captures_total', len(batch))
+
+            now = time.monotonic()
+            if stopping or now - last_sync >= self.flush_interval:
+                self.applySync()
+                last_sync = now
+
+    def idleTimeout(self):
+        """Seconds the writer thread may sleep with nothing queued: forever, unless held
+        duplicates need releasing when their window passes."""
+        return self.dedup.window if self.dedup is not None else None
+
+    def commit(self, batch):
+        """Writes a group of captures with a single call to the log file. Captures are put in
+        time order first, since several receivers may be feeding the same writer."""
+        lines = []
+        batch.sort(key=lambda capture: capture.timestamp or 0)
+        for capture in batch:
+            if self.echo:
+                print(capture.hex)
+            lines.append(foundLine(capture.frequency, capture.repeats, capture.timestamp, capture.last_timestamp) + capture.hex + "\n")
+            if self.store is not None:
+                self.store.appendCapture(capture, self.rf_settings)
+            if self.index is not None:
+                self.index.addCapture(capture)
+        self.file.write("".join(lines))
+        self.written += len(batch)
+        self.batches += 1
+
+    def applySync(self):
+        """Applies the configured sync policy to the log and the store."""
+        if self.sync == SYNC_NONE:
+            return
+        self.file.flush()
+        if self.sync == SYNC_FSYNC:
+            os.fsync(self.file.fileno())
+        if self.store is not None:
+            self.store.flush(self.sync == SYNC_FSYNC)
+        if self.index is not None:
+            self.index.flush()
+
+    def close(self):
+        """Drains the queue, syncs and closes the log. Safe to call more than once."""
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        if not self.file.closed:
+            self.file.flush()
+            self.file.close()
@@ -1,133 +1,299 @@
-from rflib import *
-import bitstring
-import time, sys, re
-sys.dont_write_bytecode = True
-from difflib import SequenceMatcher
-
-#-----------------Start RF Capture ----------------#
-def capturePayload(d, rolling_code, rf_settings):
-    """Starts a listener and returns an RFrecv capture and signal strength.
-    If rolling code options are sent, it will check for valid packets while the jammer is running."""
-    
-    capture = ""        # Capture without Rolling code
-    roll_captures = []  # List of captures for RollingCode
-
-    roll_count = 0      # Used to count 2 captures
-    while True:
-        try:
-            y, z = d.RFrecv()
-            capture = y.encode('hex')
-            signal_strength = -ord(str(d.getRSSI()))  # Convert RSSI to a negative integer
-        except ChipconUsbTimeoutException:
-            pass
-
-        # This block is used for rolling code operations
-        if rolling_code and capture:  # If there is a good capture and we are attacking rollingCode, execute this block
-            print("SIGNAL STRENGTH: " + str(signal_strength))
-            print("RF CAPTURE: \n" + capture + "\n")
-            decision = determineRealTransmission(signal_strength, rf_settings)
-            if decision:
-                roll_captures.append(capture)  # Add key with good decision to the list
-                if roll_count >= 1:  # Check if we have 2 keys and return
-                    return roll_captures, signal_strength
-                else:
-                    roll_count += 1
-                    continue
-            else:
-                continue
-
-        # This block is for just capturing and returning, no rolling code
-        elif capture and not rolling_code:
-            print("SIGNAL STRENGTH: " + str(signal_strength))
-            print("RF CAPTURE: \n" + capture + "\n")
-
-            response = input("\"Do you want to return the above payload? (y/n): ")
-            if response.lower() == 'y':
-                break
-            if response.lower() == 'n':
-                capture = ""
-
-    return capture, signal_strength
-
-
-#----------------- Determine Real Transmission ----------------#
-def determineRealTransmission(signal_strength, rf_settings):
-    """Used to search for transmissions which are not max power and fall between
-    defined RSSI power levels."""
-    if rf_settings.lower_rssi < signal_strength < rf_settings.upper_rssi:
-        return True
-    return False
-
-
-#------------Split Captures by 4 or more 0's --------------------#
-def splitCaptureByZeros(capture):
-    """Parses hex from the capture by reducing 0's."""
-    payloads = re.split('0000*', capture)
-    items = [payload for payload in payloads if len(payload) > 5]
-    return items
-
-
-#------------Split Device Settings Configuration --------------------#
-def parseDeviceSettings(file_data):
-    """Parses file device configuration and returns a list."""
-    settings = [re.split(':', data) for data in file_data]
-    print(settings)
-    return settings
-
-
-#------------ Hex conversion function --------------------#
-def printFormatedHex(payload):
-    """Helper function that takes RFrecv output and returns formatted hex.
-    Note: Don't just use this output into your send, but you can manually paste its output in a string."""
-    
-    formatedPayload = ""
-    if len(payload) % 2 == 0:
-        print("The following payload is currently being formatted: " + payload)
-        iterator = iter(payload)
-        for i in iterator:
-            formatedPayload += ('\\x' + i + next(iterator))
-
-    return formatedPayload
-
-
-#------------Create Payloads in Bytes--------------------#
-def createBytesFromPayloads(payloads):
-    """Accepts a list of payloads for formatting and returns a list formatted in byte format
-    for RFXmit transmission."""
-    formatedPayloads = [turnToBytes(bin(int(payload, 16))[2:]) for payload in payloads]
-    return formatedPayloads
-
-def turnToBytes(binary):
-    """Converts binary payloads into sendable byte payloads."""
-    payloadBytes = bitstring.BitArray(bin=(binary)).tobytes()
-    return payloadBytes
-
-
-#------------Send Transmission--------------------#
-def sendTransmission(payload, d):
-    """Expects formatted data for sending with RFXMIT."""
-    print("Sending payload...")
-    d.RFxmit(payload, 10)
-    print("Transmission Complete")
-
-
-#-------------------Parse the log file------------#
-def parseSignalsFromLog(log_file):
-    """Creates a multidimensional array of signals from a logfile split by 0000's."""
-    payloads = []
-    with open(log_file) as f:
-        for line in f:
-            if "found" not in line:
-                payloads.append(splitCaptureByZeros(line))
-    return payloads
-
-def similar(a, b):
-    """Returns the similarity ratio between two strings."""
-    return SequenceMatcher(None, a, b).ratio()
-
-
-#-------------------Parse single Log Entry From live Clicker------------#
-def parseSignalsLive(click):
-    """Creates a multidimensional array of signals from a logfile split by 0000's."""
-    payloads = [splitCaptureByZeros(click)]
-    return payloads
+import bitstring
+from devices import MOD_ASK_OOK, MOD_2FSK
+from Capture import Capture
+from RadioConfig import RadioConfig
+import burstSegmenter
+import captureStream
+import metrics
+import sys, re, os, mmap
+sys.dont_write_bytecode = True
+from difflib import SequenceMatcher
+
+#-----------------Configure the Radio ----------------#
+def deviceSettings(rf_settings):
+    """Returns the (setter name, args) configuration calls that apply RFSettings to an RfCat."""
+    settings = [
+        ('setFreq', (int(rf_settings.frequency),)),
+        ('setMdmDRate', (rf_settings.baud_rate,)),
+        ('setMaxPower', ()),
+        ('setMdmChanSpc', (rf_settings.channel_spacing,)),
+        ('setMdmChanBW', (rf_settings.channel_bandwidth,)),
+        ('setMdmSyncMode', (0,)),
+        ('setChannel', (0,)),
+        ('lowball', (1,)),
+    ]
+    if rf_settings.deviation != 0:
+        settings.append(('setMdmDeviatn', (rf_settings.deviation,)))
+    if rf_settings.modulation_type == "MOD_ASK_OOK":
+        settings.append(('setMdmModulation', (MOD_ASK_OOK,)))
+    elif rf_settings.modulation_type == "MOD_2FSK":
+        settings.append(('setMdmModulation', (MOD_2FSK,)))
+    return settings
+
+def configureDevice(d, rf_settings, template=None):
+    """Applies RFSettings to an RfCat for listening and sending. Only settings that differ
+    from what the radio already has are sent, and a saved template's registers are
+    cached so it can be reapplied with a single write."""
+    config = RadioConfig.of(d)
+    config.apply(deviceSettings(rf_settings), template)
+    return config
+
+def tune(d, frequency):
+    """Tunes an RfCat, skipping the call if it is already on the frequency."""
+    RadioConfig.of(d).tune(frequency)
+
+
+#-----------------Start RF Capture ----------------#
+def capturePayload(d, rolling_code, rf_settings, interactive=True):
+    """Starts a listener and returns an RFrecv capture and signal strength.
+    If rolling code options are sent, it will check for valid packets while the jammer is running
+    and return a list of up to 2 of them, fewer if the captures end first.
+    Without interactive the first capture is returned instead of asking about each one.
+    Captures come from a captureStream I/O thread, so the radio keeps receiving while a
+    payload is being considered."""
+    
+    capture = None      # Capture without Rolling code
+    roll_captures = []  # List of captures for RollingCode
+
+    roll_count = 0      # Used to count 2 captures
+    signal_strength = None
+    captures = captureStream.iterCaptures(d, rf_settings.frequency)
+    try:
+        for capture in captures:
+            signal_strength = capture.rssi
+
+            # This block is used for rolling code operations
+            if rolling_code:  # If there is a good capture and we are attacking rollingCode, execute this block
+                print("SIGNAL STRENGTH: " + str(signal_strength))
+                print("RF CAPTURE: \n" + capture.hex + "\n")
+                decision = determineRealTransmission(signal_strength, rf_settings)
+                if decision:
+                    roll_captures.append(capture)  # Add key with good decision to the list
+                    if roll_count >= 1:  # Check if we have 2 keys and return
+                        return roll_captures, signal_strength
+                    else:
+                        roll_count += 1
+                continue
+
+            # This block is for just capturing and returning, no rolling code
+            print("SIGNAL STRENGTH: " + str(signal_strength))
+            print("RF CAPTURE: \n" + capture.hex + "\n")
+            if not interactive:
+                break
+
+            response = input("\"Do you want to return the above payload? (y/n): ")
+            if response.lower() == 'y':
+                break
+            if response.lower() == 'n':
+                capture = None
+        else:
+            capture = None
+    finally:
+        captures.close()
+
+    if rolling_code:
+        # The stream ended before two good captures, return however many there were
+        return roll_captures, signal_strength
+    return capture, signal_strength
+
+
+#----------------- Determine Real Transmission ----------------#
+def determineRealTransmission(signal_strength, rf_settings):
+    """Used to search for transmissions which are not max power and fall between
+    defined RSSI power levels."""
+    if rf_settings.lower_rssi < signal_strength < rf_settings.upper_rssi:
+        return True
+    return False
+
+
+# The line written before each capture in a scanning log, and a match for its frequency and,
+# for deduplicated captures, its repeat count
+FOUND_PREFIX = b"A signal was found on:"
+FOUND_LINE = re.compile(rb'A signal was found on:\s*(\d+)(?:\s*\(repeated (\d+) times)?')
+
+
+#------------Split Captures by 4 or more 0's --------------------#
+def splitCaptureByZeros(capture, min_gap=None, min_burst=None):
+    """Splits a capture (hex text or a Capture) into its bursts wherever at least min_gap
+    zero bits separate them, dropping bursts shorter than min_burst bits. The thresholds
+    default to those set with burstSegmenter.configure. Returns the bursts as Captures."""
+    return burstSegmenter.segment(capture, min_gap, min_burst)
+
+
+#------------Split Device Settings Configuration --------------------#
+def parseDeviceSettings(file_data):
+    """Parses file device configuration and returns a list."""
+    settings = [re.split(':', data) for data in file_data]
+    print(settings)
+    return settings
+
+
+#------------ Hex conversion function --------------------#
+def printFormatedHex(payload):
+    """Helper function that takes RFrecv output and returns formatted hex.
+    Note: Don't just use this output into your send, but you can manually paste its output in a string."""
+    
+    formatedPayload = ""
+    if len(payload) % 2 == 0:
+        print("The following payload is currently being formatted: " + payload)
+        iterator = iter(payload)
+        for i in iterator:
+            formatedPayload += ('\\x' + i + next(iterator))
+
+    return formatedPayload
+
+
+#------------Create Payloads in Bytes--------------------#
+def createBytesFromPayloads(payloads):
+    """Accepts a list of payloads (Captures or hex) and returns them in byte format for
+    RFXmit transmission. Captures are sent as received and hex keeps its leading zeros."""
+    formatedPayloads = [bytes(Capture.of(payload)) for payload in payloads]
+    return formatedPayloads
+
+def turnToBytes(binary):
+    """Converts binary payloads into sendable byte payloads."""
+    payloadBytes = bitstring.BitArray(bin=(binary)).tobytes()
+    return payloadBytes
+
+
+#------------Send Transmission--------------------#
+def sendTransmission(payload, d):
+    """Expects formatted data for sending with RFXMIT."""
+    print("Sending payload...")
+    d.RFxmit(payload, 10)
+    print("Transmission Complete")
+
+
+#-------------------Load a saved capture------------#
+def loadCapturePayload(cap_file):
+    """Returns the first hex payload saved in a .cap file."""
+    with open(cap_file) as f:
+        for line in f:
+            if line.strip():
+                return line.strip()
+    return ""
+
+
+#-------------------Parse the log file------------#
+def parseSignalsFromLog(log_file):
+    """Creates a multidimensional array of signals from a logfile split into bursts."""
+    return [segments for _, segments in iterSignalsFromLog(log_file)]
+
+# Captures read from a log before they are segmented together
+SEGMENT_BATCH = 256
+
+def iterSignalsFromLog(log_file, frequencies=None, freq_range=None, start=0, stop=None):
+    """Lazily yields (frequency, segments) for every capture in a scanning log, keeping the
+    frequency from the "found" line before it. The log is memory-mapped and read a line at a
+    time, so memory stays flat however large the log is. Filters are checked on the "found"
+    line so captures that do not match are skipped without being split.
+
+    Args:
+        log_file (str): The scanning log to read.
+        frequencies (set): Only yield captures on these frequencies.
+        freq_range (tuple): Only yield captures with low <= frequency <= high.
+        start (int): Byte offset to start from, moved forward to the next "found" line.
+        stop (int): Byte offset to stop at; a record starting before it is read in full.
+            Consecutive (start, stop) ranges split a log without losing or repeating records.
+    """
+    with open(log_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            # Records begin at their "found" line, so start at the first one at or after start
+            position = log.find(FOUND_PREFIX, start) if start > 0 else 0
+            if position < 0:
+                return
+            log.seek(position)
+
+            frequency = None
+            wanted = frequencies is None and freq_range is None
+            pending = []    # (frequency, Capture) waiting to be segmented as one batch
+            while log.tell() < size:
+                line_start = log.tell()
+                line = log.readline()
+                found = FOUND_LINE.match(line)
+                if found:
+                    if stop is not None and line_start >= stop:
+                        break
+                    frequency = int(found.group(1))
+                    wanted = ((frequencies is None or frequency in frequencies) and
+                              (freq_range is None or freq_range[0] <= frequency <= freq_range[1]))
+                    continue
+                line = line.strip()
+                if wanted and line:
+                    pending.append((frequency, Capture.fromHex(line.decode(), frequency)))
+                    if len(pending) >= SEGMENT_BATCH:
+                        yield from segmentPending(pending)
+                        pending = []
+            yield from segmentPending(pending)
+
+def segmentPending(pending):
+    """Segments a batch of (frequency, Capture) pairs together and yields (frequency, bursts)."""
+    with metrics.timed('stage_seconds', stage="segment"):
+        bursts = burstSegmenter.segmentBatch([capture for _, capture in pending])
+    for (frequency, _), segments in zip(pending, bursts):
+        yield frequency, segments
+
+def loadSignalsFromLog(log_file, cache=None, **filters):
+    """Returns every (frequency, segments) pair of iterSignalsFromLog as a list. With an
+    AnalysisCache the segmentation is stored under the log's content hash, the filters and the
+    burst thresholds, so analysing the same log again skips the hex parsing and splitting.
+
+    Args:
+        log_file (str): The scanning log to read.
+        cache (AnalysisCache): Optional cache to read the segmentation from or save it to.
+        filters: frequencies and freq_range, as for iterSignalsFromLog.
+    """
+    if cache is None:
+        return list(iterSignalsFromLog(log_file, **filters))
+    import numpy as np
+    from AnalysisCache import fileDigest
+    key = cache.key("segments", [fileDigest(log_file)], filters=filters,
+                    min_gap=burstSegmenter.min_gap_bits, min_burst=burstSegmenter.min_burst_bits)
+
+    # Stored as one array holding the capture and burst counts, each capture's frequency and
+    # burst count and each burst's bit and byte lengths, next to every burst's bytes back to back
+    stored = cache.getArray(key + "-lengths")
+    data = cache.get(key) if stored is not None else None
+    if data is not None:
+        captures, total = stored[:2].tolist()
+        frequencies, counts, bit_lengths, byte_lengths = np.split(stored[2:], np.cumsum([captures, captures, total]))
+        ends = np.cumsum(byte_lengths)
+        bursts = [Capture(data[end - size:end], bit_length=int(bits))
+                  for end, size, bits in zip(ends.tolist(), byte_lengths.tolist(), bit_lengths.tolist())]
+        signals, position = [], 0
+        for frequency, count in zip(frequencies.tolist(), counts.tolist()):
+            frequency = frequency or None
+            segments = bursts[position:position + count]
+            for burst in segments:
+                burst.frequency = frequency
+            signals.append((frequency, segments))
+            position += count
+        return signals
+
+    signals = list(iterSignalsFromLog(log_file, **filters))
+    bursts = [burst for _, segments in signals for burst in segments]
+    sizes = [len(burst) for burst in bursts]
+    stored = np.array([len(signals), len(bursts)]
+                      + [frequency or 0 for frequency, _ in signals]
+                      + [len(segments) for _, segments in signals]
+                      + [burst.bit_length for burst in bursts]
+                      + sizes, dtype=np.int64)
+    # A segmentation bigger than the cache would only push everything else out and then itself
+    if cache.fits(sum(sizes) + stored.nbytes):
+        cache.put(key, b"".join(bytes(burst) for burst in bursts))
+        cache.putArray(key + "-lengths", stored)
+    return signals
+
+def similar(a, b):
+    """Returns the similarity ratio between two strings."""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+#-------------------Parse single Log Entry From live Clicker------------#
+def parseSignalsLive(click):
+    """Creates a multidimensional array of signals from a live capture split into bursts."""
+    payloads = [splitCaptureByZeros(click)]
+    return payloads
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import weakref
+import metrics
+sys.dont_write_bytecode = True
+
+# Radio configuration layer for every device opened in this process
+_configs = weakref.WeakKeyDictionary()
+
+class RadioConfig:
+    """Tracks the configuration calls that have been applied to a radio so repeated calls with
+    the same arguments are skipped. Each setter is a USB round trip on a YardStick, so
+    switching templates or retuning to the same frequency only pays for what changed.
+
+    For a saved template the register image the calls produce is cached next to the template,
+    and the next time the template is applied it is written back with one bulk write."""
+
+    def __init__(self, d):
+        self.d = d
+        self.state = {}      # Setter name to the arguments last applied
+        self.calls = 0       # Configuration calls made on the radio
+        self.avoided = 0     # Configuration calls skipped because nothing changed
+
+    @classmethod
+    def of(cls, d):
+        """Returns the configuration layer for a radio, creating it on first use."""
+        config = _configs.get(d)
+        if config is None:
+            config = _configs[d] = cls(d)
+        return config
+
+    def call(self, name, *args):
+        """Makes one configuration call unless the radio already has these arguments."""
+        if self.state.get(name) == args:
+            self.avoided += 1
+            return
+        with metrics.timed('rfcat_config_call_seconds', call=name):
+            getattr(self.d, name)(*args)
+        self.state[name] = args
+        self.calls += 1
+
+    def tune(self, frequency):
+        self.call('setFreq', int(frequency))
+
+    def apply(self, settings, template=None):
+        """Brings the radio to a configuration.
+
+        Args:
+            settings (list): (setter name, args tuple) pairs in the order they are applied.
+            template (str): Path of the saved template the settings came from, enabling the
+                register image cache.
+        """
+        if template is not None and self.applyCachedImage(settings, template):
+            return
+        for name, args in settings:
+            self.call(name, *args)
+        if template is not None:
+            self.saveImage(settings, template)
+
+    #------------ Register image cache --------------------#
+    def bulkCapable(self):
+        """True when the radio exposes rflib's register image (getRadioConfig/setRadioConfig)."""
+        return hasattr(self.d, 'radiocfg') and hasattr(self.d, 'getRadioConfig') and hasattr(self.d, 'setRadioConfig')
+
+    @staticmethod
+    def imagePath(template):
+        return os.path.splitext(template)[0] + ".regs"
+
+    @staticmethod
+    def settingsKey(settings):
+        return [[name, list(args)] for name, args in settings]
+
+    def applyCachedImage(self, settings, template):
+        """Writes a template's cached register image in one call, if one matches the settings."""
+        path = self.imagePath(template)
+        if not self.bulkCapable() or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cached.get("settings") != self.settingsKey(settings):
+            return False
+        self.d.setRadioConfig(bytes.fromhex(cached["registers"]))
+        self.state.update((name, tuple(args)) for name, args in settings)
+        self.calls += 1
+        self.avoided += len(settings) - 1
+        return True
+
+    def saveImage(self, settings, template):
+        """Reads back the register image the settings produced and caches it for the template."""
+        if not self.bulkCapable():
+            return
+        try:
+            self.d.getRadioConfig()
+            registers = self.d.radiocfg.vsEmit()
+            if isinstance(registers, str):
+                registers = registers.encode('latin-1')
+            with open(self.imagePath(template), 'w') as f:
+                json.dump({"settings": self.settingsKey(settings), "registers": registers.hex()}, f)
+        except Exception as e:
+            print(f"Error caching radio registers: {e}")
+
+    def describe(self):
+        return f"{self.calls} radio configuration calls made, {self.avoided} avoided"
@@ -0,0 +1,123 @@
+import numpy as np
+import json
+import os
+import sys
+from collections import namedtuple
+from Capture import Capture
+import bitCompare
+import burstSegmenter
+import metrics
+sys.dont_write_bytecode = True
+
+DEFAULT_PATH = os.path.join(".", "device_templates", "references.jsonl")
+
+Match = namedtuple('Match', ['label', 'score', 'reference'])
+
+class ReferenceLibrary:
+    """Labeled captures of known remotes, kept next to the device templates. References are
+    split into bursts like any other capture and the bits of every burst are packed once into
+    a single bitCompare.BitBatch held in memory, so a new capture is scored against the whole
+    library in one compareBatch pass per burst and the result is ranked by label. References
+    are appended to a JSON-lines file as they are added."""
+
+    def __init__(self, path=DEFAULT_PATH, max_shift=bitCompare.DEFAULT_MAX_SHIFT):
+        """Opens a library, loading any references already saved at path.
+
+        Args:
+            path (str): File the library is persisted to, or None to keep it in memory only.
+            max_shift (int): The largest bit slip searched when scoring a capture.
+        """
+        self.path = path
+        self.max_shift = max_shift
+        self.labels = []         # Label of each reference by id
+        self.payloads = []       # Hex of each reference by id
+        self.frequencies = []    # Frequency of each reference by id
+        self.bursts = []         # Bit array of every reference burst
+        self.burst_refs = []     # Reference id of every burst
+        self.owners = None       # burst_refs as an array, built with the batch
+        self.label_ids = None    # Label number of each reference, built with the batch
+        self.batch = None        # Packed bits of every burst, rebuilt after an add
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.insert(entry["label"], entry["payload"], entry.get("frequency"))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def insert(self, label, payload_hex, frequency):
+        capture = Capture.fromHex(payload_hex)
+        self.labels.append(label)
+        self.payloads.append(capture.hex)
+        self.frequencies.append(frequency)
+        # A remote repeats its code, so most references only add one distinct burst
+        for burst in dict.fromkeys(burstSegmenter.segment(capture) or [capture]):
+            self.bursts.append(burst.bits)
+            self.burst_refs.append(len(self.labels) - 1)
+        self.batch = None
+
+    def add(self, label, payload, frequency=None):
+        """Adds a labeled Capture or hex payload to the library and saves it.
+
+        Returns:
+            int: The id of the new reference.
+        """
+        capture = Capture.of(payload)
+        if frequency is None:
+            frequency = capture.frequency
+        self.insert(label, capture.hex, frequency)
+        if self.path is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({"label": label, "payload": capture.hex, "frequency": frequency}) + "\n")
+        return len(self.labels) - 1
+
+    def pack(self):
+        """Packs every reference burst into the batch that captures are scored against."""
+        if self.batch is None:
+            self.batch = bitCompare.packBatch(self.bursts, self.max_shift)
+            self.owners = np.array(self.burst_refs, dtype=np.int64)
+            ids = {}
+            self.label_ids = np.array([ids.setdefault(label, len(ids)) for label in self.labels], dtype=np.int64)
+        return self.batch
+
+    def scores(self, bursts):
+        """Returns the best ratio any burst of each reference reaches against any of bursts."""
+        batch = self.pack()
+        best = np.zeros(len(self.labels))
+        for burst in bursts:
+            np.maximum.at(best, self.owners, bitCompare.compareBatch(burst, batch).ratios)
+        return best
+
+    def classify(self, capture, top=5):
+        """Ranks the library's labels by how well a capture matches them.
+
+        Args:
+            capture (Capture, str or list): A capture or hex payload, which is split into
+                bursts, or the bursts already split (such as one press from a log).
+            top (int): The number of labels returned.
+
+        Returns:
+            list: Match(label, score, reference id) tuples, best first. A label's score
+                is that of its best matching reference.
+        """
+        if not self.labels:
+            return []
+        bursts = capture if isinstance(capture, (list, tuple, burstSegmenter.Bursts)) else burstSegmenter.segment(capture) or [capture]
+        with metrics.timed('stage_seconds', stage="classify"):
+            ratios = self.scores(bursts)
+            # Best reference per label: sort by ratio, keep each label's first appearance
+            order = np.argsort(-ratios, kind='stable')
+            _, first = np.unique(self.label_ids[order], return_index=True)
+            ranked = order[np.sort(first)][:top]
+        metrics.inc('classified_total')
+        return [Match(self.labels[i], float(ratios[i]), int(i)) for i in ranked]
+
+    def describe(self, matches):
+        """Returns a one line summary of a classify() result."""
+        if not matches:
+            return "No references to match against"
+        return ", ".join(f"{match.label} {match.score * 100:.1f}%" for match in matches)
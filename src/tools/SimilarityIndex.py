@@ -0,0 +1,200 @@
+import numpy as np
+import json
+import os
+import sys
+from collections import defaultdict
+from Capture import Capture
+import RFFunctions as tools
+import bitCompare
+sys.dont_write_bytecode = True
+
+SHINGLE_BITS = 32     # Width of the bit windows a capture is broken into, long enough to span several OOK symbols
+NUM_HASHES = 64       # MinHash signature length
+BANDS = 16            # LSH bands, each covering NUM_HASHES // BANDS signature rows
+_PRIME = (1 << 31) - 1
+
+# Fixed hash parameters so signatures stay comparable between runs
+_rng = np.random.RandomState(0x5EED)
+_A = _rng.randint(1, _PRIME, size=NUM_HASHES).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_HASHES).astype(np.uint64)
+_POWERS = (1 << np.arange(SHINGLE_BITS - 1, -1, -1)).astype(np.uint64)
+
+#------------ Signatures --------------------#
+def shingles(bits):
+    """Returns the distinct SHINGLE_BITS-wide windows of a bit array as integers."""
+    bits = np.asarray(bits, dtype=np.uint64)
+    if len(bits) < SHINGLE_BITS:
+        return np.array([int(bits @ _POWERS[SHINGLE_BITS - len(bits):]) if len(bits) else 0], dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(bits, SHINGLE_BITS)
+    return np.unique(windows @ _POWERS)
+
+def signature(payload):
+    """Returns the MinHash signature of a Capture, hex payload or bit array."""
+    values = shingles(bitCompare.toBits(payload))
+    return ((_A[:, None] * values[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+def estimatedJaccard(sig1, sig2):
+    """Estimates the Jaccard similarity of two captures' shingle sets from their signatures."""
+    return float(np.count_nonzero(sig1 == sig2)) / NUM_HASHES
+
+
+class SimilarityIndex:
+    """Near-duplicate index over captures using MinHash signatures of bit shingles and
+    locality-sensitive hashing. Captures that share any LSH band bucket become candidates,
+    so a top-k or clustering query only looks at a handful of entries however many have
+    been indexed. Entries are appended to a JSON-lines file as they are added, and the
+    buckets are rebuilt from it when the index is reopened."""
+
+    def __init__(self, path=None):
+        """Opens an index, loading any entries already saved at path.
+
+        Args:
+            path (str): File the index is persisted to, or None to keep it in memory only.
+        """
+        self.path = path
+        self.payloads = []       # Hex of each entry by id
+        self.frequencies = []    # Frequency of each entry by id
+        self.labels = []         # Optional label of each entry by id
+        self.signatures = []     # MinHash signature of each entry by id
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        self.file = None
+
+        if path is not None:
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            sig = np.frombuffer(bytes.fromhex(entry["signature"]), dtype=np.uint32)
+                            self.insert(entry["payload"], entry.get("frequency"), entry.get("label"), sig)
+            self.file = open(path, 'a')
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def bandKeys(self, sig):
+        """Returns the bucket key of each LSH band of a signature."""
+        rows = NUM_HASHES // BANDS
+        return [sig[band * rows:(band + 1) * rows].tobytes() for band in range(BANDS)]
+
+    def insert(self, payload_hex, frequency, label, sig):
+        """Adds an entry to the in-memory tables and returns its id."""
+        entry_id = len(self.payloads)
+        self.payloads.append(payload_hex)
+        self.frequencies.append(frequency)
+        self.labels.append(label)
+        self.signatures.append(sig)
+        for bucket, key in zip(self.buckets, self.bandKeys(sig)):
+            bucket[key].append(entry_id)
+        return entry_id
+
+    #------------ Building --------------------#
+    def add(self, payload, frequency=None, label=None):
+        """Indexes a capture and appends it to the index file.
+
+        Args:
+            payload (Capture or str): The capture or its hex.
+            frequency (int): The frequency it was received on, taken from a Capture if not given.
+            label (str): Optional name for the capture.
+
+        Returns:
+            int: The id of the new entry.
+        """
+        capture = Capture.of(payload)
+        if frequency is None:
+            frequency = capture.frequency
+        sig = signature(capture)
+        entry_id = self.insert(capture.hex, frequency, label, sig)
+        if self.file is not None:
+            self.file.write(json.dumps({"payload": capture.hex, "frequency": frequency,
+                                        "label": label, "signature": sig.tobytes().hex()}) + "\n")
+        return entry_id
+
+    def addSegments(self, segments, frequency=None):
+        """Indexes each burst of a capture that has been split by zeros."""
+        return [self.add(segment, frequency) for segment in segments]
+
+    def addCapture(self, capture):
+        """Splits a received Capture into bursts and indexes each of them."""
+        return self.addSegments(tools.splitCaptureByZeros(capture), capture.frequency)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    #------------ Querying --------------------#
+    def candidates(self, sig):
+        """Returns the ids sharing at least one LSH bucket with a signature."""
+        found = set()
+        for bucket, key in zip(self.buckets, self.bandKeys(sig)):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def topK(self, payload, k=5):
+        """Returns up to k (id, score) pairs most similar to a payload, best first. The payload
+        is split into bursts the way captures are indexed, candidates are those of any of its
+        bursts in the LSH buckets, and each is scored with the bit comparison engine by the
+        burst that matches it best.
+
+        Args:
+            payload (Capture or str): The capture to look up.
+            k (int): The most results to return.
+        """
+        # Repeated bursts of a held button only need looking up once
+        bursts = list({burst.hex: burst for burst in tools.splitCaptureByZeros(payload)}.values())
+        if not bursts:
+            bursts = [Capture.of(payload)]
+        ids = set()
+        for burst in bursts:
+            ids |= self.candidates(signature(burst))
+        if not ids:
+            return []
+        ids = sorted(ids)
+        payloads = [self.payloads[i] for i in ids]
+        ratios = np.max([bitCompare.compareBatch(burst, payloads).ratios for burst in bursts], axis=0)
+        order = np.argsort(-ratios, kind='stable')[:k]
+        return [(ids[i], float(ratios[i])) for i in order]
+
+    def clusters(self, threshold=0.5):
+        """Groups every entry into signal families. Entries that share a bucket and whose
+        estimated Jaccard similarity is at least threshold are joined, transitively.
+
+        Returns:
+            list: Lists of entry ids, largest family first.
+        """
+        parent = list(range(len(self)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for bucket in self.buckets:
+            for ids in bucket.values():
+                first = ids[0]
+                for other in ids[1:]:
+                    root1, root2 = find(first), find(other)
+                    if root1 != root2 and estimatedJaccard(self.signatures[first], self.signatures[other]) >= threshold:
+                        parent[root2] = root1
+
+        families = defaultdict(list)
+        for i in range(len(self)):
+            families[find(i)].append(i)
+        return sorted(families.values(), key=len, reverse=True)
+
+    def describe(self, entry_id):
+        """Returns a one-line description of an entry for printing."""
+        label = f"{self.labels[entry_id]} " if self.labels[entry_id] else ""
+        return f"#{entry_id} {label}on {self.frequencies[entry_id]}: {self.payloads[entry_id]}"
@@ -0,0 +1,195 @@
+import bisect
+import random
+import sys
+import time
+from collections import namedtuple
+sys.dont_write_bytecode = True
+
+from devices import ChipconUsbTimeoutException
+
+# Default rflib receive timeout in milliseconds (USB_RX_WAIT)
+RECV_TIMEOUT = 1000
+
+SimulatedCapture = namedtuple('SimulatedCapture', ['time', 'frequency', 'payload', 'rssi'])
+
+class SimulatedRfCat:
+    """Stands in for rflib.RfCat by replaying recorded or synthetic captures. Captures are
+    delivered on the frequency they were recorded on (within a tolerance) at their recorded
+    offsets from the start of the session, RSSI follows the last capture and RFrecv raises
+    ChipconUsbTimeoutException when nothing arrives in time. The session runs on a virtual
+    clock which is slept through at the given speed, so speed=0 replays with no waiting."""
+
+    def __init__(self, captures, speed=1.0, tolerance=30000, noise_rssi=-100,
+                 retune_time=0.0005, rssi_time=0.001, on_air=0.05, loop=False, duration=None):
+        """Sets up the replay.
+
+        Args:
+            captures (list): SimulatedCapture tuples, times in seconds from the session start.
+            speed (float): Multiple of real time to run at, 0 to run as fast as possible.
+            tolerance (int): Hz either side of a capture's frequency it can be received on.
+            noise_rssi (int): RSSI reported when nothing is being received.
+            retune_time (float): Virtual seconds a setFreq call takes.
+            rssi_time (float): Virtual seconds a getRSSI call takes.
+            on_air (float): Seconds a capture is being transmitted before it is received,
+                during which getRSSI reports its strength.
+            loop (bool): If True, the session starts over once it has been played through.
+            duration (float): Virtual seconds after which the session is finished, defaults
+                to the time of the last capture unless looping.
+        """
+        self.speed = speed
+        self.tolerance = tolerance
+        self.noise_rssi = noise_rssi
+        self.retune_time = retune_time
+        self.rssi_time = rssi_time
+        self.on_air = on_air
+        self.loop = loop
+
+        self.channels = {}    # Frequency to (sorted capture times, captures)
+        for capture in sorted(captures):
+            times, records = self.channels.setdefault(capture.frequency, ([], []))
+            times.append(capture.time)
+            records.append(capture)
+        self.span = max((c.time for c in captures), default=0.0) + 1.0
+        if duration is None and not loop:
+            duration = self.span
+        self.duration = duration
+
+        self.now = 0.0        # Virtual seconds since the session started
+        self.epoch = time.time()  # Wall time the session started at, which capture timestamps count from
+        self.frequency = 0
+        self.last_rssi = noise_rssi
+        self.transmitted = []  # Payloads sent with RFxmit
+        self.config = {}       # Last arguments of every configuration call
+
+    #------------ Building sessions --------------------#
+    @classmethod
+    def fromStore(cls, path, **kwargs):
+        """Replays the captures in a CaptureStore with their recorded timing."""
+        from CaptureStore import CaptureStore
+        with CaptureStore(path) as store:
+            records = list(store.query())
+        start = min((r.timestamp for r in records), default=0.0)
+        captures = [SimulatedCapture(r.timestamp - start, r.frequency, r.payload,
+                                     r.rssi if r.rssi is not None else -60) for r in records]
+        return cls(captures, **kwargs)
+
+    @classmethod
+    def fromTextLog(cls, log_file, interval=1.0, **kwargs):
+        """Replays a text scanning log. Text logs hold no timing, so captures are spaced
+        interval seconds apart."""
+        from RFFunctions import FOUND_LINE
+        from CaptureStore import hexToBytes, parseFoundLine
+        captures = []
+        frequency = 0
+        with open(log_file, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                found = FOUND_LINE.match(line)
+                if found:
+                    frequency = parseFoundLine(found)[0]
+                elif line:
+                    captures.append(SimulatedCapture(len(captures) * interval, frequency, hexToBytes(line.decode()), -60))
+        return cls(captures, **kwargs)
+
+    @classmethod
+    def synthetic(cls, frequencies, rate=1.0, duration=60.0, key_bits=24, repeats=4, seed=None, **kwargs):
+        """Builds a session of keyfob-like OOK bursts arriving at random on each frequency.
+
+        Args:
+            frequencies (list): Frequencies with a transmitter on them.
+            rate (float): Average presses per second on each frequency.
+            duration (float): Length of the session in seconds.
+            key_bits (int): Data bits per key, PWM encoded as in sonteremote.py.
+            repeats (int): Times each key is repeated within a press.
+            seed (int): Seed for reproducible sessions.
+        """
+        rng = random.Random(seed)
+        captures = []
+        for frequency in frequencies:
+            key = ''.join(rng.choice('01') for _ in range(key_bits))
+            pwm_key = ''.join(['1000' if b == '1' else '1110' for b in key]) + '0' * 32
+            bits = (pwm_key * repeats).ljust(-(-len(pwm_key) * repeats // 8) * 8, '0')
+            payload = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+            rssi = rng.randint(-80, -40)
+            t = rng.expovariate(rate)
+            while t < duration:
+                captures.append(SimulatedCapture(t, frequency, payload, rssi + rng.randint(-3, 3)))
+                t += rng.expovariate(rate)
+        kwargs.setdefault('duration', duration)
+        return cls(captures, **kwargs)
+
+    #------------ Virtual clock --------------------#
+    def advance(self, seconds):
+        """Moves the virtual clock forward, sleeping through it unless running at full speed."""
+        self.now += seconds
+        if self.speed:
+            time.sleep(seconds / self.speed)
+
+    @property
+    def finished(self):
+        """True once the virtual clock has passed the end of the session."""
+        return self.duration is not None and self.now >= self.duration
+
+    def nextCapture(self):
+        """Returns the next capture receivable on the tuned frequency and the virtual time
+        it arrives at, or (None, None) if nothing more will arrive."""
+        best, best_time = None, None
+        passes = int(self.now // self.span) if self.loop else 0
+        for frequency, (times, records) in self.channels.items():
+            if abs(frequency - self.frequency) > self.tolerance:
+                continue
+            start = passes * self.span
+            i = bisect.bisect_left(times, self.now - start)
+            if i == len(times) and self.loop:
+                # Nothing left in this pass, take the first capture of the next one
+                i, start = 0, start + self.span
+            if i < len(times) and (best_time is None or times[i] + start < best_time):
+                best, best_time = records[i], times[i] + start
+        return best, best_time
+
+    #------------ RfCat interface --------------------#
+    def setFreq(self, freq, *args):
+        self.frequency = int(freq)
+        self.advance(self.retune_time)
+
+    def getFreq(self):
+        return self.frequency
+
+    def RFrecv(self, timeout=RECV_TIMEOUT, blocksize=None):
+        """Waits up to timeout milliseconds for a capture on the tuned frequency."""
+        capture, arrival = self.nextCapture()
+        wait = timeout / 1000.0
+        if capture is not None and arrival - self.now <= wait:
+            self.advance(arrival - self.now)
+            # Step past the capture so it is delivered once
+            self.now += 1e-9
+            self.last_rssi = capture.rssi
+            return capture.payload, arrival
+        self.advance(wait)
+        self.last_rssi = self.noise_rssi
+        raise ChipconUsbTimeoutException()
+
+    def getRSSI(self):
+        """Returns the RSSI byte the way rflib does: the strength of a capture being transmitted
+        on the tuned frequency, otherwise the last reading."""
+        self.advance(self.rssi_time)
+        capture, arrival = self.nextCapture()
+        rssi = self.last_rssi
+        if capture is not None and arrival - self.now < self.on_air:
+            rssi = capture.rssi
+        return bytes([min(abs(int(rssi)), 255)])
+
+    def RFxmit(self, data, repeat=0, offset=0):
+        self.transmitted.append((self.frequency, data, repeat))
+
+    def setModeIDLE(self):
+        pass
+
+    def __getattr__(self, name):
+        """Accepts radio configuration calls (setMdmDRate, lowball, makePktFLEN...) and remembers
+        their arguments without doing anything with them."""
+        if name.startswith(('set', 'make', 'lowball')):
+            def configure(*args, **kwargs):
+                self.config[name] = args
+            return configure
+        raise AttributeError(name)
@@ -0,0 +1,225 @@
+import itertools
+import numpy as np
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+sys.dont_write_bytecode = True
+
+# Level of detail: the most points a trace is drawn with, beyond which it becomes a min/max
+# envelope, and the pixels a bit needs before its label can be read
+MAX_TRACE_POINTS = 2000
+LABEL_MIN_PIXELS = 7
+ZOOM_MARGIN_BITS = 8
+
+FIGURE_SIZE = (8, 3)
+
+# Where each payload's waveform and labels sit on the graph
+CAPTURED_Y = 4
+KEYFOB_Y = 2
+LABEL_OFFSET = -0.5
+
+# Figure state owned by each worker process, built once and reused for every image
+_figure = None
+_axes = None
+_captured_line = None
+_keyfob_line = None
+_captured_bits = None
+_labels = []
+
+#-----------------Level of Detail ----------------#
+def viewRange(*bit_arrays, margin=ZOOM_MARGIN_BITS):
+    """Returns the (start, stop) bits to show so the graph zooms onto the bursts: the silence
+    before the first set bit and after the last one is cut down to margin bits."""
+    starts, stops, longest = [], [], 0
+    for bits in bit_arrays:
+        bits = np.asarray(bits)
+        longest = max(longest, len(bits))
+        ones = np.flatnonzero(bits)
+        if len(ones):
+            starts.append(ones[0])
+            stops.append(ones[-1] + 1)
+    if not starts:
+        return 0, max(longest, 1)
+    return max(0, int(min(starts)) - margin), min(longest, int(max(stops)) + margin)
+
+def _stepData(bits, start=0, stop=None, max_points=MAX_TRACE_POINTS):
+    """Returns x/y arrays that draw bits[start:stop] as a square wave. Up to max_points the
+    wave is exact. Longer spans are cut into blocks that are each drawn as a vertical stroke
+    from their lowest to their highest bit, which looks the same at the image's resolution
+    while keeping the point count, and the memory behind it, fixed."""
+    bits = np.asarray(bits)[start:stop]
+    if len(bits) == 0:
+        return np.zeros(0), np.zeros(0)
+    if 2 * len(bits) <= max_points:
+        x = np.repeat(np.arange(start, start + len(bits) + 1), 2)[1:-1]
+        return x, np.repeat(bits, 2)
+
+    block = -(-2 * len(bits) // max_points)
+    padded = np.pad(bits, (0, -len(bits) % block), mode='edge').reshape(-1, block)
+    x = np.repeat(start + block * np.arange(len(padded)), 2)
+    y = np.column_stack((padded.min(axis=1), padded.max(axis=1))).ravel()
+    return x, y
+
+def labelStride(axes, start, stop):
+    """Returns 1 or 2 if every bit, or every other bit, in start:stop can be labelled
+    legibly at the axes' current width, or 0 if labels would overlap."""
+    pixels_per_bit = axes.bbox.width / max(stop - start, 1)
+    for stride in (1, 2):
+        if pixels_per_bit * stride >= LABEL_MIN_PIXELS:
+            return stride
+    return 0
+
+def drawLabels(axes, bits, y, start, stop, stride):
+    """Writes the value under every stride-th bit of bits[start:stop] and returns the text artists."""
+    bits = np.asarray(bits)
+    return [axes.text(position + 0.5, y + LABEL_OFFSET, str(int(bits[position])), fontsize=7, ha='center')
+            for position in range(start, min(stop, len(bits)), stride)]
+
+def drawComparison(axes, captured_bits, keyfob_bits, captured_line=None, keyfob_line=None):
+    """Draws both payloads at the level of detail their zoomed span allows. Existing lines are
+    updated in place when given, otherwise new ones are plotted.
+
+    Returns:
+        tuple: The captured line, the keyfob line and the label artists drawn.
+    """
+    captured_bits, keyfob_bits = np.atleast_1d(captured_bits), np.atleast_1d(keyfob_bits)
+    start, stop = viewRange(captured_bits, keyfob_bits)
+    lines = []
+    for line, bits, y in ((captured_line, captured_bits, CAPTURED_Y), (keyfob_line, keyfob_bits, KEYFOB_Y)):
+        x, wave = _stepData(bits, start, stop)
+        if line is None:
+            line, = axes.plot(x, wave + y, 'r', linewidth=2)
+        else:
+            line.set_data(x, wave + y)
+        lines.append(line)
+    axes.set_xlim(start, stop)
+
+    labels = []
+    stride = labelStride(axes, start, stop)
+    if stride:
+        labels += drawLabels(axes, captured_bits, CAPTURED_Y, start, stop, stride)
+        labels += drawLabels(axes, keyfob_bits, KEYFOB_Y, start, stop, stride)
+    return lines[0], lines[1], labels
+
+
+#-----------------Worker Setup ----------------#
+def initWorker(captured_bits, figsize=FIGURE_SIZE):
+    """Builds the worker's Agg figure with empty lines for both payloads. The figure is
+    created without pyplot so no global plotting state is shared or rebuilt between images."""
+    global _figure, _axes, _captured_line, _keyfob_line, _captured_bits, _labels
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    _figure = Figure(figsize=figsize)
+    FigureCanvasAgg(_figure)
+    _axes = _figure.add_subplot()
+    _axes.set_ylim([-1, 6])
+    _axes.axis('off')
+
+    _captured_bits = np.asarray(captured_bits)
+    _captured_line, = _axes.plot([], [], 'r', linewidth=2)
+    _keyfob_line, = _axes.plot([], [], 'r', linewidth=2)
+    _labels = []
+
+
+#-----------------Rendering ----------------#
+def renderComparison(job):
+    """Draws one keyfob payload under the captured payload, zoomed onto their bursts, and
+    writes the PNG atomically so a reader never sees a half-written image.
+
+    Args:
+        job (tuple): The output path and the keyfob payload's bits.
+
+    Returns:
+        str: The path written.
+    """
+    global _labels
+    path, keyfob_bits = job
+    for label in _labels:
+        label.remove()
+    # The zoomed span depends on both payloads, so the captured line is redrawn too
+    _, _, _labels = drawComparison(_axes, _captured_bits, keyfob_bits, _captured_line, _keyfob_line)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    _figure.savefig(temp_path, format='png')
+    os.replace(temp_path, path)
+    return path
+
+def graphKey(cache, captured_bits, keyfob_bits):
+    """Returns the AnalysisCache key of the image of one comparison."""
+    return cache.key("graph", [np.asarray(captured_bits, dtype=np.uint8), np.atleast_1d(keyfob_bits).astype(np.uint8)],
+                     figsize=FIGURE_SIZE, points=MAX_TRACE_POINTS, label_pixels=LABEL_MIN_PIXELS, margin=ZOOM_MARGIN_BITS)
+
+def renderBatch(captured_bits, jobs, workers=None, chunksize=4, verbose=True, cache=None, max_pending=256):
+    """Renders comparison graphs across a pool of processes. Jobs are read max_pending at a
+    time, so a generator of jobs is never held in memory as a whole.
+
+    Args:
+        captured_bits (np.ndarray): Bits of the known payload as uint8, drawn on every graph.
+        jobs (iterable): (output path, keyfob bits) pairs, the bits as a uint8 array.
+        workers (int): Number of processes, defaults to the CPU count.
+        chunksize (int): Jobs handed to a worker at a time.
+        verbose (bool): If True, prints the rendering rate.
+        cache (AnalysisCache): Optional cache that images are copied from when the same
+            comparison has been drawn before, and that new images are added to. Jobs with
+            the same payloads are then only drawn once.
+        max_pending (int): The most jobs read ahead of the images being written.
+
+    Returns:
+        list: The paths written, in job order.
+    """
+    started = time.perf_counter()
+    captured_bits = np.asarray(captured_bits, dtype=np.uint8)
+    jobs = iter(jobs)
+    paths, sources = [], {}
+    rendered = 0
+    pool = None
+    local = False    # Whether this process has been set up to render itself
+    try:
+        while True:
+            pending = list(itertools.islice(jobs, max_pending))
+            if not pending:
+                break
+            paths += [path for path, _ in pending]
+            keys, copies = {}, []
+            if cache is not None:
+                keys = {path: graphKey(cache, captured_bits, keyfob_bits) for path, keyfob_bits in pending}
+                first = {}
+                for job in pending:
+                    if keys[job[0]] in sources:
+                        copies.append(job[0])
+                        continue
+                    sources[keys[job[0]]] = job[0]
+                    if not cache.getFile(keys[job[0]], job[0]):
+                        first[keys[job[0]]] = job
+                pending = list(first.values())
+
+            if not pending:
+                written = []
+            elif workers == 1 or (pool is None and len(pending) == 1):
+                if not local:
+                    initWorker(captured_bits)
+                    local = True
+                written = [renderComparison(job) for job in pending]
+            else:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(captured_bits,))
+                written = list(pool.map(renderComparison, pending, chunksize=chunksize))
+            rendered += len(written)
+            if cache is not None:
+                for path in written:
+                    cache.putFile(keys[path], path)
+                # Repeats of an image are copied from the first one drawn, which the cache may not keep
+                for path in copies:
+                    shutil.copyfile(sources[keys[path]], path)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    if verbose and paths:
+        print(f"Rendered {rendered} images and reused {len(paths) - rendered} in {elapsed:.2f}s "
+              f"({len(paths) / elapsed:.1f} images/s)")
+    return paths
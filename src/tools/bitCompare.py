@@ -0,0 +1,146 @@
+import numpy as np
+import sys
+from collections import namedtuple
+from Capture import Capture
+sys.dont_write_bytecode = True
+
+# Maximum number of bits a candidate may slip against the reference
+DEFAULT_MAX_SHIFT = 8
+
+# Number of set bits for every possible byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+# Packed rows are padded to whole 64-bit words so they can be counted a word at a time
+_WORD_BITS = 64
+
+BitBatch = namedtuple('BitBatch', ['packed', 'masks', 'lengths', 'offset'])
+CompareResult = namedtuple('CompareResult', ['hamming', 'offsets', 'matches', 'ratios'])
+
+#------------ Payloads to bit arrays --------------------#
+def toBits(payload):
+    """Returns the bits of a payload as a numpy array of 0/1 values. Every bit is kept,
+    including leading zeros, so captures line up with what was actually received.
+
+    Args:
+        payload (Capture, str or np.ndarray): A Capture, hex text, or bits already unpacked.
+
+    Returns:
+        np.ndarray: uint8 array holding one bit per element.
+    """
+    if isinstance(payload, np.ndarray):
+        return payload
+    return Capture.of(payload).bits
+
+
+#------------ Pack a batch of candidates --------------------#
+def packBatch(bit_arrays, max_shift=DEFAULT_MAX_SHIFT, width=None):
+    """Packs a list of bit arrays into one padded matrix of bytes with a matching validity mask.
+    Every row leaves max_shift bits of padding on each side so references can slide over it.
+
+    Args:
+        bit_arrays (list): Arrays of 0/1 values, one per candidate.
+        max_shift (int): The largest bit slip that will be searched.
+        width (int): Optional frame width in bits, defaults to the longest candidate.
+
+    Returns:
+        BitBatch: The packed bits, packed masks, candidate lengths and frame offset.
+    """
+    lengths = np.array([len(bits) for bits in bit_arrays], dtype=np.int64)
+    longest = int(lengths.max()) if len(lengths) else 0
+    if width is None or width < longest:
+        width = longest
+    frame = max(1, -(-(width + 2 * max_shift) // _WORD_BITS)) * _WORD_BITS
+
+    bits = np.zeros((len(bit_arrays), frame), dtype=np.uint8)
+    masks = np.zeros((len(bit_arrays), frame), dtype=np.uint8)
+    for row, candidate in enumerate(bit_arrays):
+        bits[row, max_shift:max_shift + len(candidate)] = candidate
+        masks[row, max_shift:max_shift + len(candidate)] = 1
+
+    return BitBatch(np.packbits(bits, axis=1), np.packbits(masks, axis=1), lengths, max_shift)
+
+
+def _placeReference(reference, start, frame):
+    """Returns the packed reference and mask placed at a bit position inside a frame."""
+    bits = np.zeros(frame, dtype=np.uint8)
+    mask = np.zeros(frame, dtype=np.uint8)
+    lo = max(start, 0)
+    hi = min(start + len(reference), frame)
+    if hi > lo:
+        bits[lo:hi] = reference[lo - start:hi - start]
+        mask[lo:hi] = 1
+    return np.packbits(bits), np.packbits(mask)
+
+
+def _words(packed):
+    """Returns packed bytes viewed as 64-bit words where numpy can count their bits
+    (bitwise_count, numpy 2.0 and later), otherwise the bytes unchanged."""
+    if hasattr(np, 'bitwise_count') and packed.shape[-1] % 8 == 0 and packed.flags.c_contiguous:
+        return packed.view(np.uint64)
+    return packed
+
+def _popcountRows(packed):
+    """Returns the number of set bits in each row of a packed matrix from _words()."""
+    if packed.dtype == np.uint64:
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[packed].sum(axis=1, dtype=np.int64)
+
+
+#------------ Compare one capture against many --------------------#
+def compareBatch(reference, candidates, max_shift=DEFAULT_MAX_SHIFT):
+    """Scores a reference capture against a batch of candidates in one pass.
+
+    Hamming distance is taken at zero offset and counts the length difference as mismatches.
+    The best offset is found by sliding the reference up to max_shift bits either way and
+    keeping the alignment with the most matching bits. The ratio uses the same 2*M/T formula
+    as difflib.SequenceMatcher so it reads like the old percentages.
+
+    Args:
+        reference (Capture, str or np.ndarray): The known capture.
+        candidates (list or BitBatch): Candidate Captures, hex or bit arrays, or a prepacked batch.
+        max_shift (int): The largest bit slip to search.
+
+    Returns:
+        CompareResult: Arrays of hamming distances, best offsets, best matches and ratios.
+    """
+    reference = toBits(reference)
+    if not isinstance(candidates, BitBatch):
+        candidates = packBatch([toBits(c) for c in candidates], max_shift)
+    max_shift = candidates.offset
+
+    count = len(candidates.lengths)
+    if count == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return CompareResult(empty, empty, empty, np.zeros(0))
+
+    frame = candidates.packed.shape[1] * 8
+    packed, masks = _words(candidates.packed), _words(candidates.masks)
+    ref_length = len(reference)
+    best_matches = np.full(count, -1, dtype=np.int64)
+    best_offsets = np.zeros(count, dtype=np.int64)
+    hamming = None
+
+    # Try zero first so ties keep the unshifted alignment
+    for shift in sorted(range(-max_shift, max_shift + 1), key=abs):
+        ref_packed, ref_mask = _placeReference(reference, candidates.offset + shift, frame)
+        overlap = masks & _words(ref_mask)
+        differ = (packed ^ _words(ref_packed)) & overlap
+        compared = _popcountRows(overlap)
+        mismatches = _popcountRows(differ)
+        matches = compared - mismatches
+
+        if shift == 0:
+            hamming = mismatches + np.abs(candidates.lengths - ref_length)
+
+        better = matches > best_matches
+        best_matches[better] = matches[better]
+        best_offsets[better] = shift
+
+    total = candidates.lengths + ref_length
+    ratios = np.divide(2.0 * best_matches, total, out=np.zeros(count), where=total > 0)
+    return CompareResult(hamming, best_offsets, best_matches, ratios)
+
+
+def similarity(payload1, payload2, max_shift=DEFAULT_MAX_SHIFT):
+    """Returns the similarity ratio between two payloads."""
+    return float(compareBatch(payload1, [payload2], max_shift).ratios[0])
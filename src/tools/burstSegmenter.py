@@ -0,0 +1,142 @@
+import numpy as np
+import sys
+from Capture import Capture
+sys.dont_write_bytecode = True
+
+# Defaults close to the old hex splitting: three zero nibbles end a burst and bursts of
+# five hex characters or fewer were dropped
+DEFAULT_MIN_GAP_BITS = 12
+DEFAULT_MIN_BURST_BITS = 24
+
+min_gap_bits = DEFAULT_MIN_GAP_BITS       # Zero bits that end a burst
+min_burst_bits = DEFAULT_MIN_BURST_BITS   # Shortest burst kept
+
+#------------ Settings --------------------#
+def bitsFor(seconds, baud_rate):
+    """Converts a duration into a number of bits at a baud rate."""
+    return max(1, int(round(seconds * baud_rate)))
+
+def configure(min_gap=None, min_burst=None, baud_rate=None, min_gap_time=None, min_burst_time=None):
+    """Sets the thresholds used when none are passed in, either in bits or, with a baud rate,
+    in seconds.
+
+    Args:
+        min_gap (int): Zero bits that end a burst.
+        min_burst (int): Shortest burst in bits that is kept.
+        baud_rate (int): Baud rate the captures were received at, for the time thresholds.
+        min_gap_time (float): Seconds of silence that end a burst.
+        min_burst_time (float): Shortest burst in seconds that is kept.
+    """
+    global min_gap_bits, min_burst_bits
+    if min_gap is not None:
+        min_gap_bits = min_gap
+    if min_burst is not None:
+        min_burst_bits = min_burst
+    if baud_rate:
+        if min_gap_time is not None:
+            min_gap_bits = bitsFor(min_gap_time, baud_rate)
+        if min_burst_time is not None:
+            min_burst_bits = bitsFor(min_burst_time, baud_rate)
+
+
+#------------ Finding bursts --------------------#
+def findBurstsBatch(bit_arrays, min_gap=None, min_burst=None):
+    """Finds the bursts in many bit arrays in one vectorized pass. A burst starts and ends on
+    a 1 bit, ends where at least min_gap zero bits follow, and is kept if it spans at least
+    min_burst bits.
+
+    Args:
+        bit_arrays (list): Arrays of 0/1 values.
+        min_gap (int): Zero bits that end a burst, defaults to the configured value.
+        min_burst (int): Shortest burst kept, defaults to the configured value.
+
+    Returns:
+        list: For each array, an (n, 2) int array of [start, stop) bit offsets into it.
+    """
+    min_gap = min_gap_bits if min_gap is None else min_gap
+    min_burst = min_burst_bits if min_burst is None else min_burst
+    if not bit_arrays:
+        return []
+
+    lengths = np.array([len(bits) for bits in bit_arrays], dtype=np.int64)
+    ends = np.cumsum(lengths)
+    origins = ends - lengths
+    ones = np.flatnonzero(np.concatenate(bit_arrays)) if ends[-1] else np.zeros(0, dtype=np.int64)
+
+    # A burst begins at the first 1, after a long enough gap, and at the first 1 of each array
+    begins = np.ones(len(ones), dtype=bool)
+    begins[1:] = np.diff(ones) > min_gap
+    array_firsts = np.searchsorted(ones, origins)
+    begins[array_firsts[array_firsts < len(ones)]] = True
+    first = np.flatnonzero(begins)
+    last = np.append(first[1:] - 1, len(ones) - 1) if len(first) else first
+
+    # Only the bursts need to know which array they came from, not every 1 bit
+    burst_owner = np.searchsorted(ends, ones[first], side='right')
+    start = ones[first] - origins[burst_owner]
+    stop = ones[last] + 1 - origins[burst_owner]
+    keep = stop - start >= min_burst
+
+    offsets = np.stack((start[keep], stop[keep]), axis=1)
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(burst_owner[keep], minlength=len(bit_arrays))))).tolist()
+    return [offsets[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+def findBursts(bits, min_gap=None, min_burst=None):
+    """Returns the [start, stop) bit offsets of the bursts in one bit array."""
+    return findBurstsBatch([np.asarray(bits)], min_gap, min_burst)[0]
+
+
+#------------ Splitting captures --------------------#
+class Bursts:
+    """The bursts of one capture as a read-only sequence. Only the capture and the burst
+    offsets are held until the bursts are first read, so splitting costs nothing per burst
+    unless a caller looks at them."""
+
+    __slots__ = ('capture', 'offsets', '_captures')
+
+    def __init__(self, capture, offsets):
+        self.capture = capture
+        self.offsets = offsets
+        self._captures = None
+
+    def captures(self):
+        """Returns the bursts as Captures, whose bits are views of the capture's bits."""
+        if self._captures is None:
+            capture, bits = self.capture, self.capture.bits
+            self._captures = [Capture.fromBits(bits[start:stop], capture.frequency, capture.rssi, capture.timestamp)
+                              for start, stop in self.offsets.tolist()]
+        return self._captures
+
+    def bits(self, index):
+        """Returns the bits of one burst without building its Capture."""
+        start, stop = self.offsets[index]
+        return self.capture.bits[start:stop]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __bool__(self):
+        return len(self.offsets) > 0
+
+    def __getitem__(self, index):
+        return self.captures()[index]
+
+    def __iter__(self):
+        return iter(self.captures())
+
+    def __repr__(self):
+        return f"Bursts({self.captures()!r})"
+
+def segmentBatch(payloads, min_gap=None, min_burst=None):
+    """Splits many Captures or hex payloads into bursts at once.
+
+    Returns:
+        list: For each payload, its bursts as a Bursts sequence of Captures.
+    """
+    captures = [Capture.of(payload) for payload in payloads]
+    offsets = findBurstsBatch([capture.bits for capture in captures], min_gap, min_burst)
+    return [Bursts(capture, found) for capture, found in zip(captures, offsets)]
+
+def segment(payload, min_gap=None, min_burst=None):
+    """Splits one Capture or hex payload into its bursts."""
+    return segmentBatch([payload], min_gap, min_burst)[0]
@@ -0,0 +1,181 @@
+import devices
+from devices import ChipconUsbTimeoutException
+from Capture import Capture
+from RadioConfig import RadioConfig
+import metrics
+import asyncio
+import queue
+import threading
+import time, sys
+sys.dont_write_bytecode = True
+
+# Default rflib receive timeout in milliseconds (USB_RX_WAIT)
+RECV_TIMEOUT = 1000
+
+_END = object()    # Queued once the I/O thread has stopped
+
+class CaptureStream:
+    """An asyncio stream of Captures received by a dedicated I/O thread. The thread owns the
+    radio while the stream is open and waits on USB so the event loop never does, leaving
+    logging, comparisons and scheduling free to run alongside it. At most max_queue captures
+    wait for the consumer; when the queue is full the thread stops receiving until there is
+    room again.
+
+        async with CaptureStream(d, 433920000) as stream:
+            async for capture in stream:
+                ...
+    """
+
+    def __init__(self, d, frequency=None, timeout=RECV_TIMEOUT, duration=None, limit=None, max_queue=64):
+        """Describes the stream; nothing is received until it is started.
+
+        Args:
+            d (RfCat): The radio, already configured.
+            frequency (int): Frequency to tune to first, or None to stay where the radio is.
+            timeout (int): Milliseconds each RFrecv waits before checking for commands.
+            duration (float): Seconds on the radio's clock after which the stream ends, or None
+                to run until closed.
+            limit (int): Number of captures after which the stream ends.
+            max_queue (int): Captures that may wait for the consumer.
+        """
+        self.d = d
+        self.frequency = frequency
+        self.timeout = timeout
+        self.duration = duration
+        self.limit = limit
+        self.max_queue = max_queue
+        self.received = 0
+        self.error = None
+        self.loop = None
+        self.ready = None      # Set from the I/O thread whenever it queues something
+        self.ended = False
+        self.items = queue.Queue(max_queue)
+        self.commands = queue.SimpleQueue()    # Frequencies to retune to between receives
+        self.stopping = threading.Event()
+        self.thread = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.thread is None:
+            self.start()
+        while not self.ended:
+            try:
+                item = self.items.get_nowait()
+            except queue.Empty:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            if item is not _END:
+                return item
+            self.ended = True
+            if self.error is not None:
+                raise self.error
+        raise StopAsyncIteration
+
+    def start(self):
+        """Starts the I/O thread. Must be called from the event loop the stream is read on."""
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.thread = threading.Thread(target=self.run, name="CaptureStream", daemon=True)
+        self.thread.start()
+
+    def tune(self, frequency):
+        """Retunes the radio before its next receive. Safe to call while the stream runs."""
+        self.commands.put(frequency)
+
+    async def close(self):
+        """Stops the I/O thread once its current receive returns."""
+        self.stopping.set()
+        if self.thread is not None:
+            # Let a thread blocked on a full queue finish its hand off
+            while self.thread.is_alive():
+                try:
+                    while True:
+                        self.items.get_nowait()
+                except queue.Empty:
+                    pass
+                await asyncio.sleep(0.01)
+
+    #------------ I/O thread --------------------#
+    def handOff(self, item):
+        """Puts an item on the consumer's queue, waiting while it is full, and wakes the consumer."""
+        while True:
+            try:
+                self.items.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self.stopping.is_set():
+                    return
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            pass    # The event loop has already been closed
+
+    def run(self):
+        # Durations follow the radio's clock so a simulated session sped up ends on time
+        now = devices.clock(self.d)
+        stamp = devices.wallClock(self.d)
+        deadline = None if self.duration is None else now() + self.duration
+        if self.frequency is not None:
+            self.commands.put(self.frequency)
+        try:
+            while not self.stopping.is_set() and not devices.sessionFinished(self.d):
+                while not self.commands.empty():
+                    self.frequency = self.commands.get()
+                    RadioConfig.of(self.d).tune(self.frequency)
+
+                timeout = self.timeout
+                if deadline is not None:
+                    remaining = deadline - now()
+                    if remaining <= 0:
+                        break
+                    timeout = max(1, min(timeout, int(remaining * 1000)))
+                started = time.perf_counter()
+                try:
+                    y, z = self.d.RFrecv(timeout=timeout)
+                except ChipconUsbTimeoutException:
+                    metrics.observe('rfcat_recv_seconds', time.perf_counter() - started, result="timeout")
+                    metrics.inc('rfcat_timeouts_total', frequency=self.frequency)
+                    continue
+                metrics.observe('rfcat_recv_seconds', time.perf_counter() - started, result="capture")
+                metrics.inc('rfcat_captures_total', frequency=self.frequency)
+                capture = Capture(y, self.frequency, devices.readSignalStrength(self.d), stamp())
+                self.received += 1
+                self.handOff(capture)
+                metrics.setGauge('capture_stream_queue_depth', self.items.qsize())
+                if self.limit is not None and self.received >= self.limit:
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.handOff(_END)
+
+
+#------------ Blocking wrappers --------------------#
+def iterCaptures(d, frequency=None, **options):
+    """Yields Captures from a CaptureStream for code that is not async. Options are passed on
+    to CaptureStream. The stream is closed when the generator is."""
+    loop = asyncio.new_event_loop()
+    stream = CaptureStream(d, frequency, **options)
+    try:
+        loop.run_until_complete(_start(stream))
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(stream.close())
+        loop.close()
+
+async def _start(stream):
+    stream.start()
@@ -0,0 +1,85 @@
+import os
+import select
+import sys
+import time
+sys.dont_write_bytecode = True
+
+# The few rflib names the tools need, with stand-ins so simulated sessions run without rflib
+try:
+    from rflib import ChipconUsbTimeoutException, keystop, MOD_ASK_OOK, MOD_2FSK
+except ImportError:
+    MOD_2FSK = 0x00
+    MOD_ASK_OOK = 0x30
+
+    class ChipconUsbTimeoutException(Exception):
+        """Stands in for rflib's timeout when rflib is not installed."""
+
+    def keystop(delay=0):
+        """True when a key has been pressed, the way rflib checks for one."""
+        if os.name == 'posix':
+            return bool(select.select([sys.stdin], [], [], delay)[0])
+        import msvcrt
+        return msvcrt.kbhit()
+
+#-----------------Open a Radio ----------------#
+def openDevice(idx=0, simulate=None, speed=1.0, loop=False):
+    """Returns the radio the modes talk to: a YardStick through rflib, or a SimulatedRfCat
+    replaying a session when simulate is given.
+
+    Args:
+        idx (int): The index of the YardStick to open.
+        simulate (str): A capture store (.store), a text scanning log (.log), or
+            "synthetic[:freq,freq,...]" for generated keyfob traffic.
+        speed (float): Multiple of real time for the simulation, 0 for as fast as possible.
+        loop (bool): If True, a simulated session starts over once played through.
+
+    Returns:
+        The RfCat or SimulatedRfCat instance.
+    """
+    if simulate is None:
+        from rflib import RfCat
+        return RfCat(idx=idx)
+
+    from SimulatedRfCat import SimulatedRfCat
+    if simulate.startswith("synthetic"):
+        _, _, frequencies = simulate.partition(":")
+        frequencies = [int(f) for f in frequencies.split(",")] if frequencies else [315000000, 433920000]
+        return SimulatedRfCat.synthetic(frequencies, seed=idx, speed=speed, loop=loop)
+    if simulate.endswith(".log"):
+        return SimulatedRfCat.fromTextLog(simulate, speed=speed, loop=loop)
+    return SimulatedRfCat.fromStore(simulate, speed=speed, loop=loop)
+
+def readSignalStrength(d):
+    """Reads the RSSI of the last packet and returns it as a negative integer."""
+    rssi = d.getRSSI()
+    if isinstance(rssi, (bytes, str)):
+        rssi = ord(rssi)
+    return -rssi
+
+def sessionFinished(d):
+    """True when a simulated radio has played through its session. Real radios never finish."""
+    return getattr(d, 'finished', False)
+
+def clock(d):
+    """Returns the clock durations on a radio are measured with: the virtual clock of a
+    simulated radio, which runs at whatever speed the session is replayed at, otherwise
+    time.monotonic."""
+    if getattr(d, 'now', None) is None:
+        return time.monotonic
+    return lambda: d.now
+
+def wait(d, seconds):
+    """Waits seconds on the radio's clock: a simulated radio's virtual clock is moved on,
+    which only sleeps as long as its replay speed asks for, otherwise this sleeps."""
+    if getattr(d, 'now', None) is None:
+        time.sleep(seconds)
+    else:
+        d.advance(seconds)
+
+def wallClock(d):
+    """Returns the clock captures are timestamped with: time.time, or for a simulated radio
+    the wall time its session started at advanced by its virtual clock, so a sped up replay
+    keeps the spacing between captures that the radio heard."""
+    if getattr(d, 'now', None) is None:
+        return time.time
+    return lambda: d.epoch + d.now
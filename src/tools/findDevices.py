@@ -1,71 +1,259 @@
-from rflib import *
-import time, re, sys
-sys.dont_write_bytecode = True
-
-# Global variables
-capture = ""
-mytime = time.strftime('%Y_%m_%d_%H%M%S')
-
-def bruteForceFreq(d, rf_settings, interval, clicker=False):
-    """Brute forces frequencies looking for one with data being sent.
-       Requires an RFCat Class, a starting frequency and the incrementing interval.
-       EX: 315000000, 50000
-    """
-    d.setFreq(rf_settings.frequency)
-    current_freq = rf_settings.frequency
-    filename = "./scanning_logs/" + mytime + ".log"
-
-    while not keystop():
-        print("Currently Scanning: " + str(current_freq) + " To cancel hit enter and wait a few seconds")
-        sniffFrequency(d, current_freq, filename, clicker)
-
-        current_freq += interval
-        d.setFreq(current_freq)
-    
-    print("Saved logfile as: ./scanning_logs/" + mytime + ".log")
-
-def searchKnownFreqs(d, known_frequencies, clicker=False):
-    """Sniffs on a rotating list of known frequencies from the default list
-       or optionally uses a list provided to the function. Requires an RFCat class.
-    """
-    filename = "./scanning_logs/" + mytime + ".log"
-    
-    while not keystop():
-        for current_freq in known_frequencies:
-            d.setFreq(current_freq)
-            print("Currently Scanning: " + str(current_freq) + " To cancel hit enter and wait a few seconds")
-            if clicker:
-                sniffFrequency(d, current_freq, "./captures/capturedClicks.log", clicker)
-            else:
-                sniffFrequency(d, current_freq, filename, clicker)
-    
-    print("Saved logfile as: " + filename)
-
-def sniffFrequency(d, current_freq, filename, clicker):
-    """Sniffs on a frequency, requires an RFCat Class with proper info set for listening."""
-    
-    if clicker:
-        while True:
-            try:
-                y, z = d.RFrecv()
-                capture = y.encode('hex')
-                print(capture)
-                saveLogs(current_freq, capture, filename)
-            except ChipconUsbTimeoutException:
-                pass
-            except KeyboardInterrupt:
-                print("User stopped the clicker sniffing.")
-                break  
-    else:
-        try:
-            y, z = d.RFrecv(timeout=3000)
-            capture = y.encode('hex')
-            print(capture)
-            saveLogs(current_freq, capture, filename)
-        except ChipconUsbTimeoutException:
-            pass
-
-def saveLogs(current_freq, capture, filename=" "):
-    """Used to create logs for scanning known and bruteforcing frequencies."""
-    with open(filename, 'a+') as file:
-        file.write("A signal was found on: " + str(current_freq) + "\n" + capture + "\n")
+import RFFunctions as tools
+from CaptureStore import CaptureStore
+from LogWriter import LogWriter
+from SimilarityIndex import SimilarityIndex
+from DwellScheduler import DwellScheduler
+from Deduplicator import Deduplicator, DEFAULT_WINDOW, DEFAULT_SPAN
+import captureStream
+import metrics
+import devices
+from devices import keystop
+import time, sys, csv
+sys.dont_write_bytecode = True
+
+# Global variables
+capture = ""
+mytime = time.strftime('%Y_%m_%d_%H%M%S')
+capture_store = None    # Optional CaptureStore that receives every capture next to the text log
+store_settings = None   # RFSettings recorded with each capture in the store
+log_writer = None       # Background LogWriter used while a scan is running
+similarity_index = None # Optional SimilarityIndex built incrementally from every capture
+reference_library = None  # Optional ReferenceLibrary every sniffed capture is classified against
+dedup_window = DEFAULT_WINDOW  # Seconds repeats of a capture are merged over, 0 to keep every copy
+dedup_span = DEFAULT_SPAN      # Hz apart repeats may be heard and still be merged
+SWEEP_END = 928000000   # Top of the CC1111's highest band, where an RSSI sweep stops by default
+# The clicker log is tailed live, so every press is written and flushed as its own record the moment it arrives
+CLICKER_LOG_OPTIONS = {"dedup": False, "flush_interval": 0}
+
+def bruteForceFreq(d, rf_settings, interval, clicker=False):
+    """Brute forces frequencies looking for one with data being sent.
+       Requires an RFCat Class, a starting frequency and the incrementing interval.
+       EX: 315000000, 50000
+    """
+    tools.tune(d, rf_settings.frequency)
+    current_freq = rf_settings.frequency
+    filename = "./scanning_logs/" + mytime + ".log"
+
+    startLogWriter(filename, clock=devices.wallClock(d))
+    try:
+        while not keystop() and not devices.sessionFinished(d):
+            print("Currently Scanning: " + str(current_freq) + " To cancel hit enter and wait a few seconds")
+            sniffFrequency(d, current_freq, filename, clicker)
+
+            current_freq += interval
+            tools.tune(d, current_freq)
+    finally:
+        stopLogWriter()
+    
+    print("Saved logfile as: ./scanning_logs/" + mytime + ".log")
+
+def measurePower(d, samples=10, interval=0.001):
+    """Reads the RSSI on the tuned frequency several times and returns the peak and mean."""
+    readings = []
+    for _ in range(samples):
+        readings.append(devices.readSignalStrength(d))
+        if interval:
+            devices.wait(d, interval)
+    return max(readings), sum(readings) / len(readings)
+
+def rssiSweep(d, rf_settings, interval, end_freq=SWEEP_END, threshold=10, samples=10, dwell=3.0, passes=1):
+    """Surveys a frequency range in two stages. A fast sweep reads only the RSSI of every
+       step to build a power table and a noise floor estimate, then full receive dwell is
+       spent only on the steps that stand out above the floor. Several passes keep the
+       highest reading of each step, catching transmitters that only key up now and then.
+       Requires an RFCat Class, a starting frequency and the incrementing interval.
+
+    Args:
+        d (RfCat): The radio.
+        rf_settings (RFSettings): Its frequency is where the sweep starts.
+        interval (int): Step between sweep bins in Hz.
+        end_freq (int): Last frequency swept.
+        threshold (int): dB above the noise floor a bin's peak must reach to be listened to.
+        samples (int): RSSI readings taken on each bin.
+        dwell (float): Seconds spent receiving on each bin that stands out.
+        passes (int): Number of RSSI sweeps over the range.
+
+    Returns:
+        list: The frequencies that stood out.
+    """
+    filename = "./scanning_logs/" + mytime + ".log"
+    power_file = "./scanning_logs/" + mytime + "_power.csv"
+    # Timed on the radio's clock, so a simulated sweep reports the time a real one would take
+    clock = devices.clock(d)
+    started = clock()
+
+    # Stage one: power versus frequency
+    power = {}
+    print("Sweeping RSSI from " + str(rf_settings.frequency) + " to " + str(end_freq) + " To cancel hit enter and wait a few seconds")
+    for sweep in range(passes):
+        current_freq = rf_settings.frequency
+        while current_freq <= end_freq and not keystop() and not devices.sessionFinished(d):
+            tools.tune(d, current_freq)
+            peak, mean = measurePower(d, samples)
+            old_peak, old_mean = power.get(current_freq, (peak, mean))
+            power[current_freq] = (max(peak, old_peak), (old_mean * sweep + mean) / (sweep + 1))
+            current_freq += interval
+    if not power:
+        return []
+    table = [(freq, peak, mean) for freq, (peak, mean) in sorted(power.items())]
+    sweep_time = clock() - started
+
+    peaks = sorted(peak for _, peak, _ in table)
+    noise_floor = peaks[len(peaks) // 2]
+    standout = [freq for freq, peak, _ in table if peak >= noise_floor + threshold]
+
+    with open(power_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["frequency", "peak_rssi", "mean_rssi", "standout"])
+        for freq, peak, mean in table:
+            writer.writerow([freq, peak, f"{mean:.1f}", int(peak >= noise_floor + threshold)])
+    print(f"Swept {len(table)} frequencies in {sweep_time:.1f}s, noise floor {noise_floor} dBm, "
+          f"{len(standout)} above {noise_floor + threshold} dBm")
+
+    # Stage two: receive only where something was heard
+    startLogWriter(filename, clock=devices.wallClock(d))
+    try:
+        for current_freq in standout:
+            if keystop() or devices.sessionFinished(d):
+                break
+            tools.tune(d, current_freq)
+            print("Currently Scanning: " + str(current_freq) + " To cancel hit enter and wait a few seconds")
+            sniffFrequency(d, current_freq, filename, False, dwell)
+    finally:
+        stopLogWriter()
+
+    print(f"Sweep took {clock() - started:.1f}s in total")
+    print("Saved power table as: " + power_file)
+    print("Saved logfile as: " + filename)
+    return standout
+
+def searchKnownFreqs(d, known_frequencies, clicker=False, scheduler=None):
+    """Sniffs on a list of known frequencies from the default list or optionally uses a
+       list provided to the function. Requires an RFCat class. A DwellScheduler decides
+       which frequency to listen to next and for how long, so active frequencies are
+       visited more often, and clicker mode is time-sliced across the whole list.
+    """
+    filename = "./scanning_logs/" + mytime + ".log"
+    if clicker:
+        filename = "./captures/capturedClicks.log"
+    # Dwells are timed on the radio's clock, so a sped up simulation is scheduled as if in real time
+    clock = devices.clock(d)
+    if scheduler is None:
+        scheduler = DwellScheduler(known_frequencies, clock=clock)
+
+    startLogWriter(filename, clock=devices.wallClock(d), **(CLICKER_LOG_OPTIONS if clicker else {}))
+    try:
+        while not keystop() and not devices.sessionFinished(d):
+            current_freq, dwell = scheduler.next()
+            tools.tune(d, current_freq)
+            print("Currently Scanning: " + str(current_freq) + " To cancel hit enter and wait a few seconds")
+            started = clock()
+            hits = sniffFrequency(d, current_freq, filename, clicker, dwell)
+            scheduler.record(current_freq, hits, clock() - started)
+    except KeyboardInterrupt:
+        print("User stopped the sniffing.")
+    finally:
+        stopLogWriter()
+
+    scheduler.printStats()
+    print("Saved logfile as: " + filename)
+
+def sniffFrequency(d, current_freq, filename, clicker, dwell=None):
+    """Sniffs on a frequency, requires an RFCat Class with proper info set for listening.
+       With a dwell in seconds it keeps listening until the dwell is up, otherwise it waits
+       for a single capture, or in clicker mode keeps listening until stopped.
+       Captures are received through a captureStream and logged as they arrive, and
+       classified against the reference library if one is open.
+       Returns the number of captures received.
+    """
+    if dwell is not None:
+        options = {"duration": dwell}
+    elif clicker:
+        options = {}
+    else:
+        options = {"duration": 3.0, "limit": 1}
+
+    hits = 0
+    captures = captureStream.iterCaptures(d, current_freq, **options)
+    try:
+        for capture in captures:
+            with metrics.timed('stage_seconds', stage="log_capture"):
+                logCapture(capture, filename)
+            if reference_library is not None:
+                print("Best matches: " + reference_library.describe(reference_library.classify(capture)))
+            hits += 1
+    except KeyboardInterrupt:
+        if not clicker or dwell is not None:
+            raise
+        print("User stopped the clicker sniffing.")
+    finally:
+        captures.close()
+    return hits
+
+def logCapture(capture, filename):
+    """Hands a Capture to the background log writer, or writes it directly when no scan is running."""
+    if log_writer is not None:
+        log_writer.submit(capture)
+    else:
+        print(capture.hex)
+        saveLogs(capture, filename)
+
+def startLogWriter(filename, dedup=True, clock=time.time, **options):
+    """Starts the background log writer for a scan. Unless dedup is False, repeats are merged
+    over dedup_window seconds on clock, the clock the scanning radio stamps its captures with.
+    Other options are passed on to LogWriter."""
+    global log_writer
+    dedup = Deduplicator(dedup_window, dedup_span, clock=clock) if dedup and dedup_window else None
+    log_writer = LogWriter(filename, capture_store, store_settings, index=similarity_index, dedup=dedup, **options)
+    return log_writer
+
+def stopLogWriter():
+    """Drains and stops the background log writer, reporting any captures it had to drop."""
+    global log_writer
+    if log_writer is not None:
+        log_writer.close()
+        if log_writer.overflows:
+            print(f"Log writer queue overflowed, {log_writer.overflows} captures were dropped")
+        if log_writer.dedup is not None and log_writer.dedup.hits:
+            print(log_writer.dedup.describe())
+        log_writer = None
+
+def saveLogs(capture, filename=" "):
+    """Used to create logs for scanning known and bruteforcing frequencies."""
+    with open(filename, 'a+') as file:
+        file.write("A signal was found on: " + str(capture.frequency) + "\n" + capture.hex + "\n")
+    if capture_store is not None:
+        capture_store.appendCapture(capture, store_settings)
+    if similarity_index is not None:
+        similarity_index.addCapture(capture)
+
+def openCaptureStore(path=None, rf_settings=None):
+    """Opens the capture store used by the scanners, defaulting to one named after this session's log."""
+    global capture_store, store_settings
+    if path is None:
+        path = "./scanning_logs/" + mytime + ".store"
+    capture_store = CaptureStore(path)
+    store_settings = rf_settings
+    return capture_store
+
+def closeCaptureStore():
+    """Flushes and closes the scanners' capture store if one is open."""
+    global capture_store
+    if capture_store is not None:
+        capture_store.close()
+        print("Saved capture store as: " + capture_store.path)
+        capture_store = None
+
+def openSimilarityIndex(path):
+    """Opens the similarity index that the scanners add every capture to."""
+    global similarity_index
+    similarity_index = SimilarityIndex(path)
+    return similarity_index
+
+def closeSimilarityIndex():
+    """Closes the scanners' similarity index if one is open."""
+    global similarity_index
+    if similarity_index is not None:
+        similarity_index.close()
+        print(f"Similarity index {similarity_index.path} holds {len(similarity_index)} captures")
+        similarity_index = None
@@ -0,0 +1,176 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import sys
+sys.dont_write_bytecode = True
+
+# Histogram bucket upper bounds in seconds, from a quick register write up to a long RFrecv
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+enabled = False     # Every recording function returns straight away until enable() is called
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) to count
+_gauges = {}        # (name, labels) to last value
+_histograms = {}    # (name, labels) to [bucket counts..., count, sum]
+_started = time.time()
+_NOT_TIMED = contextlib.nullcontext()
+
+_exporter = None
+_exporter_stop = threading.Event()
+
+#------------ Recording --------------------#
+def enable():
+    """Turns recording on and restarts the clock rates are measured from."""
+    global enabled, _started
+    enabled = True
+    _started = time.time()
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def inc(name, value=1, **labels):
+    """Adds to a counter."""
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def setGauge(name, value, **labels):
+    """Records the current value of something, such as a queue depth."""
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+def observe(name, seconds, **labels):
+    """Adds a duration to a latency histogram."""
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        histogram[-2] += 1
+        histogram[-1] += seconds
+
+class _Timer:
+    __slots__ = ('name', 'labels', 'started')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+def timed(name, **labels):
+    """Context manager adding the time its block takes to a histogram. Returns a shared
+    do-nothing context when recording is off."""
+    if not enabled:
+        return _NOT_TIMED
+    return _Timer(name, labels)
+
+
+#------------ Exporting --------------------#
+def snapshot():
+    """Returns every metric as a JSON-ready dictionary. Counters also get a per second rate
+    over the time recording has been on."""
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        histograms = {key: list(value) for key, value in _histograms.items()}
+    elapsed = max(time.time() - _started, 1e-9)
+
+    def entry(key, **values):
+        return dict(name=key[0], labels=dict(key[1]), **values)
+
+    return {
+        "time": time.time(),
+        "uptime_seconds": elapsed,
+        "counters": [entry(key, value=value, per_second=value / elapsed) for key, value in sorted(counters.items())],
+        "gauges": [entry(key, value=value) for key, value in sorted(gauges.items())],
+        "histograms": [entry(key, buckets=dict(zip(map(str, LATENCY_BUCKETS), value[:-2])),
+                             count=value[-2], sum=value[-1]) for key, value in sorted(histograms.items())],
+    }
+
+def _labelText(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+def prometheusText():
+    """Returns every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        histograms = {key: list(value) for key, value in _histograms.items()}
+
+    lines = []
+    typed = set()
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        declare(name, "counter")
+        lines.append(f"{name}{_labelText(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        declare(name, "gauge")
+        lines.append(f"{name}{_labelText(labels)} {value}")
+    for (name, labels), value in sorted(histograms.items()):
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, value[:-2]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labelText(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_bucket{_labelText(labels, [('le', '+Inf')])} {value[-2]}")
+        lines.append(f"{name}_count{_labelText(labels)} {value[-2]}")
+        lines.append(f"{name}_sum{_labelText(labels)} {value[-1]:.6f}")
+    return "\n".join(lines) + "\n"
+
+def writeSnapshot(path):
+    """Writes the metrics to path atomically, as JSON for a .json path and in the Prometheus
+    text format otherwise (a node_exporter textfile collector reads .prom files)."""
+    text = json.dumps(snapshot(), indent=1) if path.endswith(".json") else prometheusText()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def startExporter(path, interval=5.0):
+    """Enables recording and rewrites the snapshot at path every interval seconds."""
+    global _exporter
+    enable()
+    _exporter_stop.clear()
+
+    def run():
+        while not _exporter_stop.wait(interval):
+            writeSnapshot(path)
+
+    _exporter = threading.Thread(target=run, name="MetricsExporter", daemon=True)
+    _exporter.path = path
+    _exporter.start()
+
+def stopExporter():
+    """Stops the exporter after writing one last snapshot."""
+    global _exporter
+    if _exporter is None:
+        return
+    _exporter_stop.set()
+    _exporter.join()
+    writeSnapshot(_exporter.path)
+    _exporter = None
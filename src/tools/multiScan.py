@@ -0,0 +1,123 @@
+import RFFunctions as tools
+import findDevices
+import devices
+from devices import keystop
+import collections
+import itertools
+import threading
+import time, sys
+sys.dont_write_bytecode = True
+
+#-----------------Shared Scan Work ----------------#
+class ScanWork:
+    """Hands out frequencies to the scanning workers. Every worker pulls its next frequency
+    from here, so faster or luckier receivers simply take more of the work, and a frequency
+    returned by a failed receiver is handed to the next worker that asks."""
+
+    def __init__(self, frequencies=None, start=None, interval=None, end=None, rounds=None):
+        """Describes the survey.
+
+        Args:
+            frequencies (list): Known frequencies, revisited in order for rounds rounds (forever if None).
+            start (int): First frequency of a brute-force range.
+            interval (int): Step of the brute-force range.
+            end (int): Last frequency of the range, or None to keep stepping until stopped.
+            rounds (int): Passes over the known frequencies before the work runs out.
+        """
+        if frequencies is not None:
+            passes = itertools.repeat(frequencies) if rounds is None else itertools.repeat(frequencies, rounds)
+            source = itertools.chain.from_iterable(passes)
+        else:
+            source = itertools.count(start, interval)
+            if end is not None:
+                source = itertools.takewhile(lambda freq: freq <= end, source)
+        self.source = source
+        self.returned = collections.deque()
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def next(self):
+        """Returns the next frequency to scan, or None when the survey is over."""
+        with self.lock:
+            if self.stop.is_set():
+                return None
+            if self.returned:
+                return self.returned.popleft()
+            return next(self.source, None)
+
+    def giveBack(self, frequency):
+        """Returns a frequency a worker could not finish so another worker scans it."""
+        with self.lock:
+            self.returned.append(frequency)
+
+
+#-----------------Scan Workers ----------------#
+def scanWorker(idx, work, rf_settings, filename, stats, open_device):
+    """Opens receiver idx and scans the frequencies it is handed until the work runs out,
+    the scan is stopped or the receiver fails."""
+    current_freq = None
+    try:
+        d = open_device(idx)
+        tools.configureDevice(d, rf_settings)
+        while not devices.sessionFinished(d):
+            current_freq = work.next()
+            if current_freq is None:
+                break
+            tools.tune(d, current_freq)
+            findDevices.sniffFrequency(d, current_freq, filename, False)
+            stats[idx]["frequencies"] += 1
+            current_freq = None
+    except Exception as e:
+        stats[idx]["error"] = str(e)
+        print(f"Receiver {idx} failed, moving its work to the other receivers: {e}")
+        if current_freq is not None:
+            work.giveBack(current_freq)
+
+def parallelScan(device_indexes, rf_settings, frequencies=None, interval=None, end_freq=None,
+                 open_device=devices.openDevice):
+    """Scans known frequencies (frequencies) or a brute-force range (interval, end_freq) with
+    one worker per receiver index, all writing to one time-ordered log.
+
+    Args:
+        device_indexes (list): The RfCat indexes of the attached receivers.
+        rf_settings (RFSettings): Settings applied to every receiver; frequency starts the range.
+        frequencies (list): Known frequencies to revisit round-robin.
+        interval (int): Step for a brute-force range.
+        end_freq (int): Where a brute-force range stops, or None to run until cancelled.
+        open_device (function): Opens a receiver given its index.
+
+    Returns:
+        dict: Per-receiver counts of frequencies scanned and any error.
+    """
+    if frequencies is not None:
+        work = ScanWork(frequencies)
+    else:
+        work = ScanWork(start=rf_settings.frequency, interval=interval, end=end_freq)
+
+    filename = "./scanning_logs/" + findDevices.mytime + ".log"
+    stats = {idx: {"frequencies": 0, "error": None} for idx in device_indexes}
+    workers = [threading.Thread(target=scanWorker, name=f"Receiver{idx}",
+                                args=(idx, work, rf_settings, filename, stats, open_device), daemon=True)
+               for idx in device_indexes]
+
+    started = time.monotonic()
+    findDevices.startLogWriter(filename)
+    try:
+        for worker in workers:
+            worker.start()
+        print(f"Scanning with {len(workers)} receivers. To cancel hit enter and wait a few seconds")
+        while any(worker.is_alive() for worker in workers) and not keystop():
+            time.sleep(0.2)
+    finally:
+        work.stop.set()
+        for worker in workers:
+            worker.join()
+        findDevices.stopLogWriter()
+
+    elapsed = time.monotonic() - started
+    total = sum(s["frequencies"] for s in stats.values())
+    for idx, s in stats.items():
+        print(f"Receiver {idx}: {s['frequencies']} frequencies scanned" + (f", failed: {s['error']}" if s["error"] else ""))
+    print(f"Scanned {total} frequencies in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.2f}/s)")
+    print("Saved logfile as: " + filename)
+    return stats
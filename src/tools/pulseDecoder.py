@@ -0,0 +1,213 @@
+import numpy as np
+import sys
+from collections import Counter, namedtuple
+import bitCompare
+sys.dont_write_bytecode = True
+
+PWM = "PWM"                # Data in the width of each pulse, constant symbol length
+PPM = "PPM"                # Data in the gap after fixed-width pulses
+MANCHESTER = "Manchester"  # Data in the direction of a transition in the middle of each bit
+UNKNOWN = "unknown"
+
+# A low run longer than this many symbol periods separates repeated frames
+FRAME_GAP_PERIODS = 6
+
+Pulses = namedtuple('Pulses', ['values', 'lengths'])
+Decoded = namedtuple('Decoded', ['encoding', 'period', 'bits', 'frames'])
+
+#------------ Run lengths --------------------#
+def runLengths(bits):
+    """Run-length encodes a bit array.
+
+    Returns:
+        Pulses: The level of each run and its length in samples.
+    """
+    bits = np.asarray(bits, dtype=np.int8)
+    if len(bits) == 0:
+        return Pulses(np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64))
+    starts = np.flatnonzero(np.diff(bits)) + 1
+    starts = np.concatenate(([0], starts))
+    return Pulses(bits[starts], np.diff(np.append(starts, len(bits))))
+
+def runLengthsBatch(bit_arrays):
+    """Run-length encodes many bit arrays at once. Runs never cross from one array to the next.
+
+    Returns:
+        list: Pulses for each array, in order.
+    """
+    if not bit_arrays:
+        return []
+    bits = np.concatenate([np.asarray(b, dtype=np.int8) for b in bit_arrays])
+    bounds = np.cumsum([len(b) for b in bit_arrays])[:-1]
+    boundary = np.zeros(len(bits), dtype=bool)
+    boundary[0] = True
+    boundary[bounds[bounds < len(bits)]] = True
+    boundary[1:] |= bits[1:] != bits[:-1]
+    starts = np.flatnonzero(boundary)
+    lengths = np.diff(np.append(starts, len(bits)))
+    values = bits[starts]
+    split = np.searchsorted(starts, bounds)
+    return [Pulses(v, l) for v, l in zip(np.split(values, split), np.split(lengths, split))]
+
+def trim(pulses):
+    """Drops the idle low runs before the first pulse and after the last one."""
+    values, lengths = pulses
+    first = 1 if len(values) and values[0] == 0 else 0
+    last = len(values) - 1 if len(values) and values[-1] == 0 else len(values)
+    return Pulses(values[first:last], lengths[first:last])
+
+
+#------------ Timing --------------------#
+def symbolPeriod(lengths):
+    """Estimates the shortest symbol element in samples: the typical length of the runs
+    in the shortest cluster."""
+    lengths = np.asarray(lengths)
+    if len(lengths) == 0:
+        return 0.0
+    shortest = np.percentile(lengths, 10)
+    return float(np.median(lengths[lengths <= 1.5 * shortest]))
+
+def splitFrames(pulses, period):
+    """Splits trimmed pulses into frames at low runs longer than FRAME_GAP_PERIODS periods."""
+    values, lengths = pulses
+    gaps = np.flatnonzero((values == 0) & (lengths > FRAME_GAP_PERIODS * period))
+    frames = []
+    start = 0
+    for gap in gaps:
+        frames.append(Pulses(values[start:gap], lengths[start:gap]))
+        start = gap + 1
+    frames.append(Pulses(values[start:], lengths[start:]))
+    return [frame for frame in frames if len(frame.values)]
+
+
+#------------ Encodings --------------------#
+def pulsePairs(frame):
+    """Returns the width of every pulse and of the gap after it. The gap after the last
+    pulse of a frame is unknown and given as -1."""
+    values, lengths = frame
+    highs = lengths[values == 1]
+    lows = lengths[values == 0]
+    if len(lows) < len(highs):
+        lows = np.append(lows, -1)
+    return highs, lows
+
+def twoLevels(widths, period):
+    """Threshold between short and long widths, or None if every width is about the same."""
+    quantized = np.round(widths / period)
+    if len(quantized) == 0 or quantized.max() == quantized.min():
+        return None
+    return (widths.min() + widths.max()) / 2.0
+
+def classify(frame, period):
+    """Works out which encoding a frame uses from its pulse and gap widths."""
+    highs, lows = pulsePairs(frame)
+    known = lows >= 0
+    high_levels = twoLevels(highs, period)
+    low_levels = twoLevels(lows[known], period)
+    if high_levels is not None:
+        symbols = np.round((highs[known] + lows[known]) / period)
+        if len(symbols) and symbols.min() == symbols.max():
+            return PWM
+    if high_levels is None and low_levels is not None:
+        return PPM
+    quantized = np.round(frame.lengths / period)
+    if len(quantized) and set(np.unique(quantized)) <= {1, 2}:
+        return MANCHESTER
+    return UNKNOWN
+
+def decodePWM(frame, period):
+    """Long pulses are 1s and short pulses 0s, as in PT2262 and EV1527 remotes."""
+    highs, _ = pulsePairs(frame)
+    threshold = twoLevels(highs, period)
+    return (highs > threshold).astype(np.uint8) if threshold is not None else None
+
+def decodePPM(frame, period):
+    """Long gaps are 1s and short gaps 0s. The last pulse of a frame carries no data."""
+    _, lows = pulsePairs(frame)
+    lows = lows[lows >= 0]
+    threshold = twoLevels(lows, period)
+    return (lows > threshold).astype(np.uint8) if threshold is not None else None
+
+def decodeManchester(frame, period):
+    """Low-to-high transitions are 1s and high-to-low 0s (IEEE 802.3). Trimming may have
+    removed a leading low half bit, so both alignments are tried and the cleaner one kept.
+    The trailing low half of a frame ending in 0 runs into the gap after it and is put back."""
+    halves = np.repeat(frame.values, np.maximum(np.round(frame.lengths / period), 1).astype(np.int64))
+    best = None
+    for padded in (halves, np.concatenate(([0], halves))):
+        if len(padded) % 2:
+            padded = np.append(padded, 0)
+        pairs = padded.reshape(-1, 2)
+        invalid = np.count_nonzero(pairs[:, 0] == pairs[:, 1])
+        if best is None or invalid < best[0]:
+            best = (invalid, pairs[:, 1].astype(np.uint8))
+    return best[1] if best[0] == 0 else None
+
+DECODERS = {PWM: decodePWM, PPM: decodePPM, MANCHESTER: decodeManchester}
+
+
+#------------ Decoding captures --------------------#
+def decodePulses(pulses, encoding=None):
+    """Decodes the run lengths of one capture. Each frame is decoded on its own and the
+    frame decoded most often is returned, so one damaged repeat does not spoil the result.
+
+    Args:
+        pulses (Pulses): Run lengths from runLengths.
+        encoding (str): PWM, PPM or MANCHESTER, detected from the widths if not given.
+
+    Returns:
+        Decoded: The encoding, symbol period in samples, data bits as a 0/1 string (None if
+            nothing could be decoded) and the number of frames that agreed.
+    """
+    pulses = trim(pulses)
+    period = symbolPeriod(pulses.lengths)
+    if period == 0:
+        return Decoded(UNKNOWN, 0.0, None, 0)
+
+    frames = splitFrames(pulses, period)
+    votes = Counter()
+    found = encoding
+    for frame in frames:
+        frame_encoding = encoding or classify(frame, period)
+        decoder = DECODERS.get(frame_encoding)
+        bits = decoder(frame, period) if decoder else None
+        if bits is not None and len(bits):
+            votes[(frame_encoding, "".join(map(str, bits.tolist())))] += 1
+    if not votes:
+        return Decoded(found or UNKNOWN, period, None, 0)
+    (found, bits), count = votes.most_common(1)[0]
+    return Decoded(found, period, bits, count)
+
+def decode(payload, encoding=None):
+    """Decodes a Capture, hex payload or bit array. See decodePulses."""
+    return decodePulses(runLengths(bitCompare.toBits(payload)), encoding)
+
+def decodeBatch(payloads, encoding=None):
+    """Decodes many payloads, run-length encoding all of them in one pass.
+
+    Returns:
+        list: A Decoded for each payload, in order.
+    """
+    bit_arrays = [bitCompare.toBits(payload) for payload in payloads]
+    return [decodePulses(pulses, encoding) for pulses in runLengthsBatch(bit_arrays)]
+
+
+#------------ Switch settings --------------------#
+TRI_STATE = {"11": "up", "00": "down", "01": "float", "10": "invalid"}
+
+def dipSwitches(payload, switches=8):
+    """Reads the address switches of a PT2262 style tri-state remote. Each switch is sent as
+    two PWM bits: 11 when tied high, 00 when tied low and 01 when left floating.
+
+    Args:
+        payload (Capture or str): A capture of one button press.
+        switches (int): Number of address switches on the remote.
+
+    Returns:
+        list: 'up', 'down', 'float' or 'invalid' for each switch, or None if the capture
+            is not PWM or is too short.
+    """
+    decoded = decode(payload, PWM)
+    if decoded.bits is None or len(decoded.bits) < 2 * switches:
+        return None
+    return [TRI_STATE[decoded.bits[i:i + 2]] for i in range(0, 2 * switches, 2)]
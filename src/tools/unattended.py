@@ -0,0 +1,162 @@
+import findDevices
+import captureStream
+import devices
+from devices import keystop
+import metrics
+from DwellScheduler import DwellScheduler
+from collections import Counter
+import sys
+sys.dont_write_bytecode = True
+
+class CaptureRules:
+    """What an unattended capture run keeps and when it stops. Rules are read from a file in
+    the same "key: value" form as the device templates, for example:
+
+        frequencies: 315000000, 433920000
+        min_rssi: -90
+        min_length: 64
+        max_captures: 1000
+        duration: 3600
+
+    Unset rules do not filter anything."""
+
+    INT_RULES = ("min_rssi", "max_rssi", "min_length", "max_length", "min_bursts", "max_captures")
+    FLOAT_RULES = ("duration", "idle_timeout", "dwell")
+    TEXT_RULES = ("encoding", "store", "log")
+
+    def __init__(self):
+        self.frequencies = None    # Frequencies to listen on, the -F frequency if not given
+        self.min_rssi = None       # Weakest signal kept
+        self.max_rssi = None       # Strongest signal kept
+        self.min_length = None     # Fewest bits a capture may have
+        self.max_length = None     # Most bits a capture may have
+        self.min_bursts = None     # Fewest bursts a capture must split into
+        self.encoding = None       # PWM, PPM or Manchester, only captures that decode as it are kept
+        self.max_captures = None   # Stop after keeping this many captures
+        self.duration = None       # Stop after this many seconds
+        self.idle_timeout = None   # Stop after this many seconds without keeping a capture
+        self.dwell = 5.0           # Seconds on each frequency when there are several
+        self.store = None          # Capture store path, defaults to one next to the scanning log
+        self.log = None            # Text log path, defaults to ./scanning_logs/<time>.log
+
+    def loadRulesFile(self, path):
+        """Reads rules from a file of "key: value" lines. Blank lines and # comments are skipped."""
+        with open(path) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                key, _, value = line.partition(":")
+                self.set(key.strip(), value.strip())
+        return self
+
+    def set(self, key, value):
+        """Sets one rule from its text or already converted value."""
+        if value is None:
+            return
+        if key == "frequencies":
+            self.frequencies = [int(f) for f in str(value).replace(",", " ").split()] if isinstance(value, str) else list(value)
+        elif key in self.INT_RULES:
+            setattr(self, key, int(value))
+        elif key in self.FLOAT_RULES:
+            setattr(self, key, float(value))
+        elif key in self.TEXT_RULES:
+            setattr(self, key, str(value))
+        else:
+            raise ValueError(f"Unknown capture rule: {key}")
+
+    def rejection(self, capture):
+        """Returns why a capture is filtered out, or None if it is kept. Cheap checks go first
+        so splitting and decoding only run on captures that could still be kept."""
+        if self.min_rssi is not None and (capture.rssi is None or capture.rssi < self.min_rssi):
+            return "rssi"
+        if self.max_rssi is not None and (capture.rssi is None or capture.rssi > self.max_rssi):
+            return "rssi"
+        if self.min_length is not None and capture.bit_length < self.min_length:
+            return "length"
+        if self.max_length is not None and capture.bit_length > self.max_length:
+            return "length"
+        if self.min_bursts is not None:
+            import burstSegmenter
+            if len(burstSegmenter.segment(capture)) < self.min_bursts:
+                return "bursts"
+        if self.encoding is not None:
+            import pulseDecoder
+            if pulseDecoder.decode(capture).encoding.lower() != self.encoding.lower():
+                return "encoding"
+        return None
+
+
+#------------ Unattended capture --------------------#
+def captureUnattended(d, rules, rf_settings):
+    """Receives without ever prompting, handing every capture the rules keep straight to the
+    background log writer and capture store. Stops when a stop rule is met, the user hits
+    enter or a simulated session ends.
+
+    Returns:
+        Counter: Captures received, kept, and rejected for each reason.
+    """
+    frequencies = rules.frequencies or [rf_settings.frequency]
+    filename = rules.log or "./scanning_logs/" + findDevices.mytime + ".log"
+    # Durations and dwells follow the radio's clock, which a simulated session may speed up
+    clock = devices.clock(d)
+    scheduler = DwellScheduler(frequencies, min_dwell=rules.dwell, max_dwell=rules.dwell, clock=clock) if len(frequencies) > 1 else None
+    counts = Counter()
+
+    started = clock()
+    last_kept = started
+    stop_reason = "stopped by user"
+    findDevices.startLogWriter(filename, clock=devices.wallClock(d), echo=False)
+    print("Capturing unattended on " + ", ".join(map(str, frequencies)) + " To cancel hit enter")
+    try:
+        while True:
+            if keystop():
+                break
+            if devices.sessionFinished(d):
+                stop_reason = "session finished"
+                break
+            frequency, dwell = scheduler.next() if scheduler else (frequencies[0], 1.0)
+            if rules.duration is not None:
+                dwell = max(0.0, min(dwell, rules.duration - (clock() - started)))
+            hits = 0
+            visit_started = clock()
+            captures = captureStream.iterCaptures(d, frequency, duration=dwell)
+            try:
+                for capture in captures:
+                    counts["received"] += 1
+                    reason = rules.rejection(capture)
+                    if reason is not None:
+                        counts["rejected " + reason] += 1
+                        metrics.inc('unattended_rejected_total', reason=reason)
+                        continue
+                    findDevices.logCapture(capture, filename)
+                    counts["kept"] += 1
+                    hits += 1
+                    last_kept = clock()
+                    if rules.max_captures is not None and counts["kept"] >= rules.max_captures:
+                        break
+            finally:
+                captures.close()
+            if scheduler:
+                scheduler.record(frequency, hits, clock() - visit_started)
+
+            now = clock()
+            if rules.max_captures is not None and counts["kept"] >= rules.max_captures:
+                stop_reason = "capture limit reached"
+                break
+            if rules.duration is not None and now - started >= rules.duration:
+                stop_reason = "duration reached"
+                break
+            if rules.idle_timeout is not None and now - last_kept >= rules.idle_timeout:
+                stop_reason = "idle timeout"
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        findDevices.stopLogWriter()
+
+    elapsed = clock() - started
+    print(f"Unattended capture ended ({stop_reason}) after {elapsed:.1f}s: "
+          + ", ".join(f"{count} {name}" for name, count in sorted(counts.items())))
+    print("Saved logfile as: " + filename)
+    return counts
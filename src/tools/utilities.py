@@ -1,80 +1,87 @@
-import time
-import os
-import findDevices
-import RFFunctions as tools
-import Clicker
-
-#-----------------Start Log Tailing ----------------#
-def logTail(my_clicker, capture_log="./captures/capturedClicks.log", verbose=False):
-    """This function acts like the Linux tail command, pulling new additions to a file 
-    since it started running. It parses for payload lines used in analysis and graphing.
-
-    Args:
-        my_clicker (Clicker): The Clicker instance used for signal analysis.
-        capture_log (str): The path to the capture log file.
-        verbose (bool): If True, prints detailed information during execution.
-    """
-    try:
-        with open(capture_log, 'r') as file:
-            # Find the size of the file and move to the end
-            st_size = os.stat(capture_log).st_size
-            file.seek(st_size)
-
-            while True:
-                where = file.tell()
-                line = file.readline()
-                if not line:
-                    time.sleep(1)
-                    file.seek(where)
-                else:
-                    if "found" not in line:
-                        presses = tools.parseSignalsLive(line)
-                        my_clicker.keyfob_payloads = presses
-                        percent = my_clicker.liveClicks()
-                        if verbose:
-                            print(f"Processed line: {line.strip()}")
-                            print(f"Click match percentage: {percent}")
-    except Exception as e:
-        print(f"Error in logTail function: {e}")
-
-#-----------------End Log Tailing ----------------#
-
-
-#-----------------Start De Bruijn Creation ----------------#
-def deBruijn(k, n):
-    """This function creates the de Bruijn sequence for brute force attacks 
-    of various lengths n. Example code acquired from de-bruijn wiki.
-
-    Args:
-        k (int or str): The alphabet size or the alphabet itself.
-        n (int): The length of the sequences to generate.
-
-    Returns:
-        str: The de Bruijn sequence.
-    """
-    try:
-        _ = int(k)
-        alphabet = list(map(str, range(k)))
-
-    except (ValueError, TypeError):
-        alphabet = k
-        k = len(k)
-
-    a = [0] * k * n
-    sequence = []
-
-    def db(t, p):
-        if t > n:
-            if n % p == 0:
-                sequence.extend(a[1:p + 1])
-        else:
-            a[t] = a[t - p]
-            db(t + 1, p)
-            for j in range(a[t - p] + 1, k):
-                a[t] = j
-                db(t + 1, t)
-
-    db(1, 1)
-    return "".join(alphabet[i] for i in sequence)
-
-#-----------------End De Bruijn Creation ----------------#
+import time
+import burstSegmenter
+from LogFollower import LogFollower
+
+#-----------------Start Log Tailing ----------------#
+def logTail(my_clicker, capture_log="./captures/capturedClicks.log", verbose=False, library=None, top=3):
+    """This function acts like the Linux tail -F command, pulling new additions to a file 
+    since it started running. It wakes on filesystem notifications, takes every line appended
+    since the last wakeup as one batch and parses the payload lines for analysis and graphing.
+    Graphs are drawn in the background, so a slow render never holds up the next batch.
+
+    Args:
+        my_clicker (Clicker): The Clicker instance used for signal analysis, or None to only classify.
+        capture_log (str): The path to the capture log file.
+        verbose (bool): If True, prints detailed information during execution.
+        library (ReferenceLibrary): Optional library each press is classified against.
+        top (int): The number of library labels printed for each press.
+    """
+    try:
+        with LogFollower(capture_log) as follower:
+            for lines in follower.batches():
+                started = time.perf_counter()
+                presses = burstSegmenter.segmentBatch([line.strip() for line in lines if line.strip() and "found" not in line])
+                presses = [press for press in presses if press]
+                if not presses:
+                    continue
+
+                if library is not None:
+                    for press in presses:
+                        print("Best matches: " + library.describe(library.classify(press, top)))
+                if my_clicker is None:
+                    continue
+
+                my_clicker.keyfob_payloads = presses
+                percent = my_clicker.liveClicks()
+                if verbose:
+                    print(f"Processed {len(presses)} captures in {(time.perf_counter() - started) * 1000:.1f} ms")
+                    print(f"Click match percentage: {percent}")
+    except KeyboardInterrupt:
+        print("User stopped the log tail.")
+    except Exception as e:
+        print(f"Error in logTail function: {e}")
+    finally:
+        if my_clicker is not None:
+            my_clicker.close()
+
+#-----------------End Log Tailing ----------------#
+
+
+#-----------------Start De Bruijn Creation ----------------#
+def deBruijn(k, n):
+    """This function creates the de Bruijn sequence for brute force attacks 
+    of various lengths n. Example code acquired from de-bruijn wiki.
+
+    Args:
+        k (int or str): The alphabet size or the alphabet itself.
+        n (int): The length of the sequences to generate.
+
+    Returns:
+        str: The de Bruijn sequence.
+    """
+    try:
+        _ = int(k)
+        alphabet = list(map(str, range(k)))
+
+    except (ValueError, TypeError):
+        alphabet = k
+        k = len(k)
+
+    a = [0] * k * n
+    sequence = []
+
+    def db(t, p):
+        if t > n:
+            if n % p == 0:
+                sequence.extend(a[1:p + 1])
+        else:
+            a[t] = a[t - p]
+            db(t + 1, p)
+            for j in range(a[t - p] + 1, k):
+                a[t] = j
+                db(t + 1, t)
+
+    db(1, 1)
+    return "".join(alphabet[i] for i in sequence)
+
+#-----------------End De Bruijn Creation ----------------#
@@ -0,0 +1,6 @@
+import os
+import sys
+sys.dont_write_bytecode = True
+
+# The tool modules import each other by name, the same way main.py loads them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "tools"))
@@ -0,0 +1,47 @@
+import numpy as np
+import random
+import sys
+from CaptureStore import CaptureStore
+sys.dont_write_bytecode = True
+
+FREQUENCIES = [315000000, 433920000, 434000000, 868000000]
+
+def scannedStore(path, records=500):
+    """A store of captures spread over a few frequencies, written in time order."""
+    rng = random.Random(7)
+    written = []
+    with CaptureStore(path) as store:
+        for i in range(records):
+            frequency = rng.choice(FREQUENCIES)
+            store.append(frequency, bytes([i % 256, 0x8e]), timestamp=1000.0 + i * 0.5)
+            written.append((frequency, 1000.0 + i * 0.5))
+    return written
+
+def test_select_matches_a_full_scan(tmp_path):
+    written = scannedStore(str(tmp_path / "scan.store"))
+    filters = [{}, {"frequency": 433920000}, {"frequency": 433920000, "start": 1050.0, "stop": 1120.0},
+               {"freq_range": (433000000, 435000000)}, {"freq_range": (400000000, 900000000), "start": 1100.0},
+               {"frequency": 315000000, "freq_range": (400000000, 900000000)}, {"frequency": 1}, {"stop": 1010.0}]
+    with CaptureStore(str(tmp_path / "scan.store")) as store:
+        for options in filters:
+            low, high = options.get("freq_range", (0, float("inf")))
+            expected = [(frequency, timestamp) for frequency, timestamp in written
+                        if options.get("frequency", frequency) == frequency and low <= frequency <= high
+                        and timestamp >= options.get("start", 0) and timestamp < options.get("stop", float("inf"))]
+            entries = store.select(**options)
+            assert list(zip(entries['frequency'].tolist(), entries['timestamp'].tolist())) == expected, options
+
+def test_select_sees_records_added_after_a_query(tmp_path):
+    scannedStore(str(tmp_path / "scan.store"), records=10)
+    with CaptureStore(str(tmp_path / "scan.store")) as store:
+        before = len(store.select(frequency=915000000))
+        store.append(915000000, b"\x8e", timestamp=2000.0)
+        assert before == 0 and len(store.select(frequency=915000000)) == 1
+
+def test_import_log_reads_repeat_counts(tmp_path):
+    log = tmp_path / "scan.log"
+    log.write_text("A signal was found on: 433920000\n8e8e\n"
+                   "A signal was found on: 315000000 (repeated 3 times over 1.00s)\ne8e8\n")
+    with CaptureStore(str(tmp_path / "scan.store")) as store:
+        assert store.importTextLog(str(log), timestamp=1000.0) == 2
+        assert [(r.frequency, r.repeats) for r in store.query()] == [(433920000, 1), (315000000, 3)]
@@ -0,0 +1,18 @@
+import sys
+import captureStream
+import devices
+from Deduplicator import Deduplicator
+from SimulatedRfCat import SimulatedRfCat, SimulatedCapture
+sys.dont_write_bytecode = True
+
+def test_presses_kept_apart_on_the_radio_clock():
+    """Presses two seconds apart on the radio stay separate records even when a
+    simulated session replays them with no waiting."""
+    payload = b"\x8e\x88\xe8\x00"
+    d = SimulatedRfCat([SimulatedCapture(t, 433920000, payload, -50) for t in (1.0, 3.0, 5.0, 5.5)], speed=0)
+    d.setFreq(433920000)
+    dedup = Deduplicator(window=1.0, clock=devices.wallClock(d))
+    captures = list(captureStream.iterCaptures(d, 433920000, duration=10.0))
+    released = dedup.add(captures) + dedup.drain()
+    assert [capture.repeats for capture in released] == [1, 1, 2]
+    assert released[2].last_timestamp - released[2].timestamp > 0.4
@@ -0,0 +1,25 @@
+import random
+import sys
+from Capture import Capture
+from SimilarityIndex import SimilarityIndex
+sys.dont_write_bytecode = True
+
+def keyfobCapture(seed, repeats=4):
+    """A PWM keyfob press: a random 24 bit key sent repeats times, 32 zero bits apart."""
+    rng = random.Random(seed)
+    key = ''.join(rng.choice('01') for _ in range(24))
+    frame = ''.join('1000' if b == '1' else '1110' for b in key) + '0' * 32
+    return Capture.fromBits([int(b) for b in frame * repeats], frequency=433920000)
+
+def test_topK_matches_a_whole_multi_burst_capture():
+    """A full capture finds the bursts it was indexed as, although its own signature covers all of them."""
+    index = SimilarityIndex()
+    wanted = set(index.addCapture(keyfobCapture(1)))
+    for seed in range(2, 12):
+        index.addCapture(keyfobCapture(seed))
+    assert len(wanted) == 4
+
+    results = index.topK(keyfobCapture(1), k=len(index))
+    assert {entry_id for entry_id, _ in results[:4]} == wanted
+    assert all(score > 0.99 for _, score in results[:4])
+    assert all(score < results[3][1] for _, score in results[4:])
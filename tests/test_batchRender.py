@@ -0,0 +1,19 @@
+import numpy as np
+import os
+import sys
+import batchRender
+sys.dont_write_bytecode = True
+
+def test_jobs_are_read_a_window_at_a_time(tmp_path):
+    """A generator of jobs is only read max_pending jobs ahead of the images written."""
+    captured = np.array([1, 0, 0, 0] * 24, dtype=np.uint8)
+    paths = [str(tmp_path / f"Graph{count}.png") for count in range(7)]
+
+    def jobs():
+        for count, path in enumerate(paths):
+            written = sum(os.path.exists(p) for p in paths)
+            assert count - written <= 2
+            yield path, np.roll(captured, count)
+
+    assert batchRender.renderBatch(captured, jobs(), workers=1, verbose=False, max_pending=2) == paths
+    assert all(os.path.exists(path) for path in paths)
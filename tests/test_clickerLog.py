@@ -0,0 +1,29 @@
+import sys
+import time
+import findDevices
+from Capture import Capture
+from LogFollower import LogFollower
+sys.dont_write_bytecode = True
+
+def test_press_visible_to_follower_within_one_batch(tmp_path, monkeypatch):
+    """A clicker press reaches a live follower as soon as the writer commits its batch,
+    without waiting for the default flush interval."""
+    path = str(tmp_path / "capturedClicks.log")
+    open(path, 'w').close()
+    monkeypatch.setattr(findDevices, "log_writer", None)
+    with LogFollower(path) as follower:
+        writer = findDevices.startLogWriter(path, echo=False, **findDevices.CLICKER_LOG_OPTIONS)
+        try:
+            capture = Capture(b"\x8e\x88\x00", frequency=433920000, timestamp=time.time())
+            assert writer.submit(capture)
+            lines = []
+            # Half the default flush interval, so only an immediate flush gets the press through
+            deadline = time.monotonic() + 0.5
+            while not lines and time.monotonic() < deadline:
+                lines = follower.readLines()
+                if not lines:
+                    follower.wait(0.05)
+            assert writer.batches == 1
+            assert lines == ["A signal was found on: 433920000", capture.hex]
+        finally:
+            findDevices.stopLogWriter()
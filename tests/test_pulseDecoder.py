@@ -0,0 +1,23 @@
+import numpy as np
+import sys
+import pulseDecoder
+sys.dont_write_bytecode = True
+
+def manchester(bits, samples=4, gap=64, repeats=3):
+    """Manchester encodes a bit string, sending it repeats times with a low gap after each frame."""
+    halves = ''.join('01' if b == '1' else '10' for b in bits)
+    frame = ''.join(h * samples for h in halves) + '0' * gap
+    return np.array([int(b) for b in frame * repeats], dtype=np.uint8)
+
+def test_manchester_frame_ending_in_zero_keeps_its_last_bit():
+    bits = "101100111000101011010110"
+    decoded = pulseDecoder.decode(manchester(bits))
+    assert decoded.encoding == pulseDecoder.MANCHESTER
+    assert decoded.bits == bits
+    assert decoded.frames == 3
+
+def test_manchester_frame_ending_in_one():
+    bits = "010011000111010100101001"
+    decoded = pulseDecoder.decode(manchester(bits))
+    assert decoded.encoding == pulseDecoder.MANCHESTER
+    assert decoded.bits == bits